@@ -0,0 +1,66 @@
+from manim import *
+from manim.utils import images
+from pathlib import Path
+from PIL import Image
+import hashlib
+import os
+import numpy as np
+
+# Decoded image cache
+#
+# Images are decoded once into RGBA .npy files under media/image_cache, keyed
+# by resolved path, modification time, target size and resampling. Later
+# renders (and parallel render workers) memory-map the same file and get a
+# read-only view of it without decoding or copying.
+
+resolved_paths = {}
+decoded = {}
+
+def image_path(name):
+    if name not in resolved_paths:
+        resolved_paths[name] = Path(images.get_full_raster_image_path(name)).resolve()
+    return resolved_paths[name]
+
+def image_array(name, size=None, resampling='nearest'):
+    path = image_path(name)
+    mtime = path.stat().st_mtime_ns
+    key = hashlib.sha1(f"{path}:{mtime}:{size}:{resampling}".encode()).hexdigest()[:16]
+    if key not in decoded:
+        cache_dir = config.get_dir('media_dir') / 'image_cache'
+        cache = cache_dir / f"{path.stem}-{key}.npy"
+        if not cache.exists():
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            image = Image.open(path).convert('RGBA')
+            if size is not None:
+                image = image.resize(size, RESAMPLING_ALGORITHMS[resampling])
+            # Write under a unique name then rename, so concurrent workers
+            # never see a partial file
+            tmp = cache.with_suffix(f'.{os.getpid()}.npy')
+            np.save(tmp, np.asarray(image))
+            os.replace(tmp, cache)
+        decoded[key] = np.load(cache, mmap_mode='r')
+    return decoded[key]
+
+class CachedImageMobject(ImageMobject):
+    def __init__(self, name, size=None, resampling='nearest', **kwargs):
+        pixels = image_array(name, size=size, resampling=resampling)
+        # ImageMobject copies whatever it is given, so hand it one pixel and
+        # swap in the shared view afterwards.
+        super().__init__(pixels[:1, :1], **kwargs)
+        self.pixel_array = pixels
+        self.path = image_path(name)
+        self.reset_points()
+        self.set_resampling_algorithm(RESAMPLING_ALGORITHMS[resampling])
+
+    def own_pixels(self):
+        # Copy on write, the cached view is read-only
+        if not self.pixel_array.flags.writeable:
+            self.pixel_array = np.array(self.pixel_array)
+
+    def set_color(self, color, alpha=None, family=True):
+        self.own_pixels()
+        return super().set_color(color, alpha, family)
+
+    def set_opacity(self, alpha):
+        self.own_pixels()
+        return super().set_opacity(alpha)
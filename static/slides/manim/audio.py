@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from manim import *
+from pathlib import Path
+import argparse
+import numpy as np
+import wave
+
+# Audio features on a timeline, for animating against a WAV file.
+#
+#   timeline = AudioTimeline('speech.wav', outputs='visemes.npy')
+#   timeline.bind(self)                  # in construct(), also adds the sound
+#   mouth = timeline.output_tracker(3)   # ValueTracker following y_t[3]
+#   self.wait(timeline.duration)
+#
+# Features are what the lip sync deck describes: 25 ms Hann windows every
+# 10 ms (100 vectors per second), the power spectrum grouped into 13 mel
+# bands, log, plus the deltas of those for 26 values per step. They are
+# computed a block of steps at a time straight from the file and only the
+# last few blocks are kept, so minutes of audio need no more memory than
+# seconds. Trackers read the scene clock, so values match the frame that
+# is written, also when animations are skipped or cached.
+#
+#   python audio.py speech.wav features.npy    # whole clip, for GRU_FEATURES
+
+STEPS_PER_SECOND = 100
+WINDOW_SECONDS = 0.025
+MEL_BANDS = 13
+FEATURE_DIM = 2 * MEL_BANDS
+# The deck resamples to 16 kHz, keep the bands below its Nyquist frequency
+MAX_FREQUENCY = 8000
+BLOCK_STEPS = 512
+CACHED_BLOCKS = 4
+
+def hz_to_mel(hz):
+    return 2595 * np.log10(1 + hz / 700)
+
+def mel_to_hz(mel):
+    return 700 * (10 ** (mel / 2595) - 1)
+
+def mel_filters(rate, n_fft, bands=MEL_BANDS):
+    """(n_fft // 2 + 1, bands) triangular filters, rfft power @ filters."""
+    top = min(MAX_FREQUENCY, rate / 2)
+    edges = mel_to_hz(np.linspace(0, hz_to_mel(top), bands + 2))
+    freqs = np.fft.rfftfreq(n_fft, 1 / rate)[:, None]
+    rising = (freqs - edges[:-2]) / (edges[1:-1] - edges[:-2])
+    falling = (edges[2:] - freqs) / (edges[2:] - edges[1:-1])
+    return np.clip(np.minimum(rising, falling), 0, None).astype(np.float32)
+
+def decode(data, width, channels):
+    """PCM bytes to float32 samples in [-1, 1] of the first (left) channel."""
+    if width == 1:
+        samples = np.frombuffer(data, np.uint8).astype(np.float32) - 128
+    elif width == 3:
+        raw = np.frombuffer(data, np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = (raw[:, 0] | raw[:, 1] << 8 | raw[:, 2] << 16).astype(np.float32)
+        samples[samples >= 1 << 23] -= 1 << 24
+    else:
+        samples = np.frombuffer(data, {2: '<i2', 4: '<i4'}[width]).astype(np.float32)
+    return samples.reshape(-1, channels)[:, 0] / (1 << (8 * width - 1))
+
+class AudioTimeline:
+    def __init__(self, path, outputs=None, block_steps=BLOCK_STEPS, cached_blocks=CACHED_BLOCKS):
+        self.path = Path(path)
+        with wave.open(str(self.path)) as f:
+            self.rate = f.getframerate()
+            self.samples = f.getnframes()
+        self.duration = self.samples / self.rate
+        self.hop = round(self.rate / STEPS_PER_SECOND)
+        self.window = round(self.rate * WINDOW_SECONDS)
+        self.n_fft = 1 << (self.window - 1).bit_length()
+        self.hann = np.hanning(self.window + 1)[:-1].astype(np.float32)
+        self.filters = mel_filters(self.rate, self.n_fft)
+        # Windows are centered on their step, like torchaudio's defaults
+        self.steps = 1 + self.samples // self.hop
+        self.block_steps = block_steps
+        self.cached_blocks = cached_blocks
+        self.blocks = OrderedDict()
+        # Model outputs per step (steps, n), .npy files are memory mapped
+        if isinstance(outputs, (str, Path)):
+            outputs = np.load(outputs, mmap_mode='r')
+        self.outputs = outputs
+        self.scene = None
+        self.start = 0.0
+
+    def read(self, begin, end):
+        """Samples [begin, end) of the file, zero outside of it."""
+        out = np.zeros(end - begin, dtype=np.float32)
+        lo, hi = max(begin, 0), min(end, self.samples)
+        if lo < hi:
+            with wave.open(str(self.path)) as f:
+                f.setpos(lo)
+                out[lo - begin:hi - begin] = decode(f.readframes(hi - lo), f.getsampwidth(), f.getnchannels())
+        return out
+
+    def log_mel(self, first, last):
+        """(last - first, MEL_BANDS) log mel energies of steps [first, last)."""
+        begin = first * self.hop - self.window // 2
+        samples = self.read(begin, (last - 1) * self.hop - self.window // 2 + self.window)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.window)[::self.hop]
+        power = np.abs(np.fft.rfft(frames * self.hann, n=self.n_fft)) ** 2
+        return np.log(power.astype(np.float32) @ self.filters + 1e-6)
+
+    def compute_block(self, k):
+        first = k * self.block_steps
+        last = min(first + self.block_steps, self.steps)
+        # One step of context on both sides for the deltas, repeated at the ends
+        lo, hi = max(first - 1, 0), min(last + 1, self.steps)
+        mel = self.log_mel(lo, hi)
+        padded = np.concatenate([mel[:1]] * (first == lo) + [mel] + [mel[-1:]] * (last == hi))
+        delta = (padded[2:] - padded[:-2]) / 2
+        return np.hstack([padded[1:-1], delta])
+
+    def block(self, k):
+        """Features of steps [k * block_steps, (k + 1) * block_steps)."""
+        features = self.blocks.get(k)
+        if features is None:
+            features = self.blocks[k] = self.compute_block(k)
+            while len(self.blocks) > self.cached_blocks:
+                self.blocks.popitem(last=False)
+        else:
+            self.blocks.move_to_end(k)
+        return features
+
+    def iter_blocks(self):
+        for k in range(-(-self.steps // self.block_steps)):
+            yield k * self.block_steps, self.block(k)
+
+    def step(self, t):
+        return int(np.clip(int(t * STEPS_PER_SECOND), 0, self.steps - 1))
+
+    def features(self, step):
+        return self.block(step // self.block_steps)[step % self.block_steps]
+
+    def stats(self):
+        """Per feature mean and standard deviation over the whole clip, one pass."""
+        total = np.zeros(FEATURE_DIM, dtype=np.float64)
+        squares = np.zeros(FEATURE_DIM, dtype=np.float64)
+        for _, features in self.iter_blocks():
+            total += features.sum(axis=0)
+            squares += (features.astype(np.float64) ** 2).sum(axis=0)
+        mean = total / self.steps
+        return mean, np.sqrt(np.maximum(squares / self.steps - mean ** 2, 0))
+
+    def bind(self, scene, sound=True):
+        """Start the timeline at the scene's current time."""
+        if sound:
+            scene.add_sound(str(self.path))
+        self.scene = scene
+        self.start = scene.time
+        return self
+
+    def time(self):
+        return self.scene.time - self.start
+
+    def tracker(self, value):
+        """ValueTracker set to value(step) at the current step of every frame."""
+        if self.scene is None:
+            raise ValueError("bind() the timeline to a scene before making trackers")
+        tracker = ValueTracker(value(self.step(self.time())))
+
+        # Taking dt makes it time based, so waits are rendered and not frozen
+        def update(mob, dt):
+            mob.set_value(value(self.step(self.time())))
+
+        tracker.add_updater(update)
+        self.scene.add(tracker)
+        return tracker
+
+    def feature_tracker(self, i):
+        return self.tracker(lambda step: float(self.features(step)[i]))
+
+    def output_tracker(self, i):
+        if self.outputs is None:
+            raise ValueError("timeline has no model outputs")
+        return self.tracker(lambda step: float(self.outputs[min(step, len(self.outputs) - 1), i]))
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute lip sync audio features of a WAV file')
+    parser.add_argument('wav')
+    parser.add_argument('output', help='.npy file of (steps, 26) features')
+    args = parser.parse_args()
+
+    timeline = AudioTimeline(args.wav)
+    # Written block by block, the whole matrix is never in memory
+    out = np.lib.format.open_memmap(args.output, mode='w+', dtype=np.float32, shape=(timeline.steps, FEATURE_DIM))
+    for first, features in timeline.iter_blocks():
+        out[first:first + len(features)] = features
+    out.flush()
+    print(f"{timeline.steps} steps ({timeline.duration:.1f}s at {timeline.rate} Hz) -> {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from manim import *
+from contextlib import nullcontext, redirect_stdout
+import argparse
+import functools
+import io
+import time
+
+from bounds import cached_bounds
+import deep
+import examples
+
+# Time layout heavy construction with and without cached_bounds(), and
+# gru() with and without component templates (see component() in deep.py).
+#
+#   python bench_bounds.py
+#   python bench_bounds.py --depth 9 --repeat 5
+
+def big_tree(depth, start=0):
+    # Complete binary search tree with 2^depth - 1 nodes
+    if depth == 0:
+        return None
+    half = 2 ** (depth - 1)
+    return examples.bt(start + half, big_tree(depth - 1, start), big_tree(depth - 1, start + half))
+
+def build_directly(cls, *args, **kwargs):
+    # Every part from scratch, what gru() did before templates
+    return cls(*args, **kwargs)
+
+def build_gru(make=deep.component):
+    # Templates are per process, start from none like a fresh render
+    deep.component_templates.clear()
+    # gru() enters cached_bounds() itself, call the undecorated one
+    with redirect_stdout(io.StringIO()):
+        return deep.gru.__wrapped__(make=make)
+
+def build_gru_plain():
+    # component() caches bounds while building templates, not here
+    return build_gru(functools.partial(deep.component, cache_bounds=False))
+
+def all_points(mob):
+    return np.concatenate([m.points for m in mob.get_family()])
+
+def timed(build, cached, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with cached_bounds() if cached else nullcontext():
+            result = build()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def compare(name, labels, build_a, build_b, cached, repeat):
+    a, expected = timed(build_a, cached[0], repeat)
+    b, result = timed(build_b, cached[1], repeat)
+    same = np.allclose(all_points(expected), all_points(result))
+    print(f"{name:<16} {labels[0]} {a * 1000:8.1f}ms  {labels[1]} {b * 1000:8.1f}ms  "
+          f"{a / b:5.2f}x  {'same' if same else 'DIFFERENT'} points")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached bounding boxes')
+    parser.add_argument('--depth', type=int, default=7, help='Levels of the bt() tree')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tree = lambda: big_tree(args.depth).center()
+    cases = {
+        'gru()': (build_gru_plain, build_gru),
+        f'bt() depth {args.depth}': (tree, tree),
+    }
+    for name, (plain, cached) in cases.items():
+        compare(name, ('plain', 'cached'), plain, cached, (False, True), args.repeat)
+    compare('gru() parts', ('built', 'templates'), lambda: build_gru(build_directly), build_gru,
+            (True, True), args.repeat)
+
+if __name__ == '__main__':
+    main()
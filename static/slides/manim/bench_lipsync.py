@@ -0,0 +1,249 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import time
+import numpy as np
+import torch
+
+# CPU inference benchmark of the lip sync models, torch and NumPy.
+#
+#   python bench_lipsync.py --threads 1 2 4 --json bench.json
+#   python bench_lipsync.py --cast ../cherry-lip-sync/bench.cast
+#
+# streaming: one 10 ms feature vector at a time, batch 1, hidden state
+#            carried between calls (what a live lip sync app does)
+# offline:   --batch clips of --clip-steps vectors through the whole model
+#
+# Every thread count runs in its own process, so the BLAS thread pool of
+# NumPy is sized from the environment before NumPy is imported. Reports
+# p50/p99 latency per call, frames per second and how many times faster
+# than real time (100 frames per second of audio) that is.
+
+# name -> (input features, GRU layer sizes, outputs), as in the deck
+MODELS = {
+    'LipSyncGRU': (26, (32,), 12),
+    'LipSyncGRU2': (26, (80, 80), 12),
+}
+STEPS_PER_SECOND = 100
+THREAD_VARIABLES = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS']
+
+def torch_model(name, seed=1234):
+    inputs, hidden, outputs = MODELS[name]
+    torch.manual_seed(seed)
+    grus = torch.nn.ModuleList(torch.nn.GRU(d, h, batch_first=True) for d, h in zip((inputs,) + hidden, hidden))
+    return grus, torch.nn.Linear(hidden[-1], outputs)
+
+class TorchModel:
+    def __init__(self, name):
+        self.grus, self.linear = torch_model(name)
+
+    def step(self, x, state):
+        # x (1, 1, inputs), state one (1, 1, hidden) per layer or None
+        state = state or [None] * len(self.grus)
+        new_state = []
+        for gru, h in zip(self.grus, state):
+            x, h = gru(x, h)
+            new_state.append(h)
+        return self.linear(x), new_state
+
+    def run(self, x):
+        for gru in self.grus:
+            x, _ = gru(x)
+        return self.linear(x)
+
+class NumpyModel:
+    """Same weights as TorchModel, float32 NumPy."""
+
+    def __init__(self, name):
+        grus, linear = torch_model(name)
+        self.layers = []
+        for gru in grus:
+            weight = lambda n: getattr(gru, n).detach().numpy().astype(np.float32)
+            # Transposed once, calls multiply row vectors from the left
+            self.layers.append((np.ascontiguousarray(weight('weight_ih_l0').T), weight('bias_ih_l0'),
+                                np.ascontiguousarray(weight('weight_hh_l0').T), weight('bias_hh_l0')))
+        self.w_out = np.ascontiguousarray(linear.weight.detach().numpy().T)
+        self.b_out = linear.bias.detach().numpy()
+
+    @staticmethod
+    def cell(gx, h, w_hh, b_hh):
+        size = h.shape[-1]
+        gh = h @ w_hh + b_hh
+        r = 1 / (1 + np.exp(-(gx[..., :size] + gh[..., :size])))
+        z = 1 / (1 + np.exp(-(gx[..., size:2 * size] + gh[..., size:2 * size])))
+        n = np.tanh(gx[..., 2 * size:] + r * gh[..., 2 * size:])
+        return n + z * (h - n)
+
+    def step(self, x, state):
+        # x (inputs,), state one (hidden,) per layer or None
+        state = state or [np.zeros(w_hh.shape[0], np.float32) for _, _, w_hh, _ in self.layers]
+        new_state = []
+        for (w_ih, b_ih, w_hh, b_hh), h in zip(self.layers, state):
+            x = self.cell(x @ w_ih + b_ih, h, w_hh, b_hh)
+            new_state.append(x)
+        return x @ self.w_out + self.b_out, new_state
+
+    def run(self, x):
+        # x (batch, steps, inputs), input projections are one matmul per layer
+        for w_ih, b_ih, w_hh, b_hh in self.layers:
+            gx = x @ w_ih + b_ih
+            h = np.zeros((x.shape[0], w_hh.shape[0]), np.float32)
+            out = np.empty((x.shape[0], x.shape[1], w_hh.shape[0]), np.float32)
+            for t in range(x.shape[1]):
+                h = out[:, t] = self.cell(gx[:, t], h, w_hh, b_hh)
+            x = out
+        return x @ self.w_out + self.b_out
+
+def percentiles(seconds):
+    micro = np.asarray(seconds) * 1e6
+    return round(float(np.percentile(micro, 50)), 1), round(float(np.percentile(micro, 99)), 1)
+
+def measure(impl, name, args):
+    rng = np.random.default_rng(0)
+    inputs = MODELS[name][0]
+    stream = rng.standard_normal((args.warmup + args.frames, inputs)).astype(np.float32)
+    clips = rng.standard_normal((args.batch, args.clip_steps, inputs)).astype(np.float32)
+    if impl == 'torch':
+        model = TorchModel(name)
+        frames = [torch.from_numpy(x).view(1, 1, -1) for x in stream]
+        clips = torch.from_numpy(clips)
+    else:
+        model = NumpyModel(name)
+        frames = list(stream)
+
+    results = []
+    state = None
+    times = []
+    for i, x in enumerate(frames):
+        start = time.perf_counter()
+        _, state = model.step(x, state)
+        if i >= args.warmup:
+            times.append(time.perf_counter() - start)
+    p50, p99 = percentiles(times)
+    fps = len(times) / sum(times)
+    results.append({'mode': 'streaming', 'batch': 1, 'p50_us': p50, 'p99_us': p99, 'fps': round(fps, 1)})
+
+    model.run(clips[:, :10])
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        model.run(clips)
+        times.append(time.perf_counter() - start)
+    p50, p99 = percentiles(times)
+    fps = args.batch * args.clip_steps * len(times) / sum(times)
+    results.append({'mode': 'offline', 'batch': args.batch, 'p50_us': p50, 'p99_us': p99, 'fps': round(fps, 1)})
+    for result in results:
+        result['realtime'] = round(result['fps'] / STEPS_PER_SECOND, 1)
+    return results
+
+def worker(args):
+    # Runs in a process whose thread variables are already set
+    torch.set_num_threads(args.worker)
+    results = []
+    with torch.inference_mode():
+        for name in args.models:
+            for impl in args.impls:
+                for result in measure(impl, name, args):
+                    results.append({'model': name, 'impl': impl, 'threads': args.worker, **result})
+    json.dump(results, sys.stdout)
+
+def check(name):
+    """Largest difference between the NumPy and torch outputs."""
+    x = np.random.default_rng(1).standard_normal((2, 50, MODELS[name][0])).astype(np.float32)
+    with torch.inference_mode():
+        expected = TorchModel(name).run(torch.from_numpy(x)).numpy()
+    return float(np.abs(NumpyModel(name).run(x) - expected).max())
+
+def machine():
+    cpu = platform.processor()
+    if Path('/proc/cpuinfo').exists():
+        names = [l.split(':', 1)[1].strip() for l in Path('/proc/cpuinfo').read_text().splitlines()
+                 if l.startswith('model name')]
+        cpu = names[0] if names else cpu
+    return {'cpu': cpu, 'cores': os.cpu_count(), 'python': platform.python_version(),
+            'torch': torch.__version__, 'numpy': np.__version__}
+
+class Transcript:
+    """Prints lines and remembers when, for an asciinema v2 recording."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.events = []
+
+    def print(self, line=''):
+        print(line, flush=True)
+        self.events.append((time.perf_counter() - self.start, line + '\r\n'))
+
+    def write(self, path, command, width, height):
+        events = []
+        t = 0.5
+        prompt = '\u001b[01;32mlipsync\u001b[00m$ '
+        events.append((t, prompt))
+        # Typed out like the recordings in the deck
+        for c in command:
+            t += 0.06
+            events.append((t, c))
+        t += 0.4
+        events.append((t, '\r\n'))
+        events += [(t + when, text) for when, text in self.events]
+        events.append((events[-1][0] + 1.0, prompt))
+        with open(path, 'w') as f:
+            f.write(json.dumps({'version': 2, 'width': width, 'height': height, 'timestamp': int(time.time()),
+                                'env': {'SHELL': '/bin/bash', 'TERM': 'xterm-256color'}}) + '\n')
+            for when, text in events:
+                f.write(json.dumps([round(when, 6), 'o', text]) + '\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU inference benchmark of the lip sync models')
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--impls', nargs='+', default=['torch', 'numpy'], choices=['torch', 'numpy'])
+    parser.add_argument('--threads', nargs='+', type=int, default=sorted({1, os.cpu_count()}))
+    parser.add_argument('--frames', type=int, default=3000, help='Streaming calls timed per run')
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=16, help='Clips per offline run')
+    parser.add_argument('--clip-steps', type=int, default=1000, help='Feature vectors per clip (10 s)')
+    parser.add_argument('--repeat', type=int, default=5, help='Offline runs')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--cast', help='Write an asciinema transcript of the run to this file')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args)
+
+    out = Transcript()
+    info = machine()
+    out.print(f"{info['cpu']}, {info['cores']} cores, torch {info['torch']}, numpy {info['numpy']}")
+    for name in args.models:
+        out.print(f"{name}: numpy matches torch within {check(name):.1e}")
+    out.print()
+    out.print(f"{'model':<12} {'impl':<6} {'threads':>7} {'mode':<10} {'batch':>5} "
+              f"{'p50 us':>9} {'p99 us':>9} {'fps':>11} {'realtime':>9}")
+    results = []
+    passed = ['--models', *args.models, '--impls', *args.impls]
+    for option in ('frames', 'warmup', 'batch', 'clip_steps', 'repeat'):
+        passed += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    for threads in args.threads:
+        env = dict(os.environ, **{v: str(threads) for v in THREAD_VARIABLES})
+        run = subprocess.run([sys.executable, __file__, *passed, '--worker', str(threads)],
+                             env=env, capture_output=True, text=True, check=True)
+        for r in json.loads(run.stdout):
+            results.append(r)
+            out.print(f"{r['model']:<12} {r['impl']:<6} {r['threads']:>7} {r['mode']:<10} {r['batch']:>5} "
+                      f"{r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {r['fps']:>11.1f} {r['realtime']:>8.1f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'machine': info, 'settings': {k: getattr(args, k) for k in
+                                                     ('frames', 'warmup', 'batch', 'clip_steps', 'repeat')},
+                       'results': results}, f, indent=2)
+    if args.cast:
+        command = ' '.join(shlex.quote(a) for a in ['python', 'bench_lipsync.py', *sys.argv[1:]])
+        out.write(args.cast, command, width=100, height=25)
+
+if __name__ == '__main__':
+    main()
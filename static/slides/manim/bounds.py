@@ -0,0 +1,234 @@
+from contextlib import contextmanager
+from manim import *
+from manim.mobject.value_tracker import ComplexValueTracker
+import numpy as np
+import weakref
+
+# Cached bounding boxes and families while building mobjects.
+#
+#   with cached_bounds():
+#       g = gru()
+#
+# Layout code (next_to, align_to, arrange, get_top, width, ...) asks for the
+# bounding box of a whole family again and again, and manim answers every
+# time by walking the family and concatenating all of its points. Inside
+# cached_bounds() each mobject remembers its family and its box. Assigning
+# points or submobjects (which is how manim changes them) throws away the
+# cached values of that mobject and of every group containing it, so
+# repeated queries are a lookup. The few manim methods that write points or
+# submobjects in place are wrapped to do the same.
+#
+# Only meant around construction code. Nothing is patched when bounds.py is
+# imported: the first cached_bounds() entered patches Mobject and friends,
+# the last one left undoes it, also when gru() is decorated with it. While
+# it is active the patches apply to every thread of the process.
+
+class State:
+    __slots__ = ['boxes', 'family', 'empty_leaf', 'parents', '__weakref__']
+
+    def __init__(self):
+        # (box of all points, box of anchors), either None if no points
+        self.boxes = None
+        self.family = None
+        self.empty_leaf = None
+        self.parents = []
+
+states = weakref.WeakKeyDictionary()
+depth = 0
+saved = []
+
+def state(mob):
+    st = states.get(mob)
+    if st is None:
+        st = states[mob] = State()
+    return st
+
+def invalidate(mob, structure=False):
+    # Stops at the first mobject with nothing cached, whose containers then
+    # have nothing cached either (they were computed from it)
+    stack = [mob]
+    while stack:
+        st = states.get(stack.pop())
+        if st is None:
+            continue
+        cleared = st.boxes is not None
+        st.boxes = None
+        if structure and st.family is not None:
+            st.family = st.empty_leaf = None
+            cleared = True
+        if cleared:
+            parents = [p() for p in st.parents]
+            stack.extend(p for p in parents if p is not None)
+
+def children_changed(mob):
+    invalidate(mob, structure=True)
+
+def submobjects_of(mob):
+    # Cached values of mob are built from these, so they must know mob
+    ref = weakref.ref(mob)
+    for sub in mob.submobjects:
+        parents = state(sub).parents
+        if ref not in parents:
+            parents.append(ref)
+    return mob.submobjects
+
+class Tracked:
+    """Data descriptor that calls on_set after every assignment."""
+
+    def __init__(self, name, on_set):
+        self.name = name
+        self.on_set = on_set
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+        self.on_set(obj)
+
+def own_boxes(mob):
+    points = mob.points
+    if len(points) == 0:
+        return None, None
+    box = np.array([points.min(axis=0), points.max(axis=0)])
+    if isinstance(mob, VMobject) and len(points) > 1:
+        # Same anchors as VMobject.get_anchors()
+        n = mob.n_points_per_cubic_curve
+        starts, ends = points[::n], points[n - 1::n]
+        k = min(len(starts), len(ends))
+        if k == 0:
+            return box, None
+        anchors = np.concatenate([starts[:k], ends[:k]])
+        return box, np.array([anchors.min(axis=0), anchors.max(axis=0)])
+    return box, box
+
+def merge(boxes):
+    boxes = [b for b in boxes if b is not None]
+    if not boxes:
+        return None
+    if len(boxes) == 1:
+        return boxes[0]
+    return np.array([np.min([b[0] for b in boxes], axis=0), np.max([b[1] for b in boxes], axis=0)])
+
+def family_boxes(mob):
+    """(box of all points, box of anchors) of the family, cached."""
+    st = state(mob)
+    if st.boxes is None:
+        box, anchor_box = own_boxes(mob)
+        subs = [family_boxes(sub) for sub in submobjects_of(mob)]
+        st.boxes = (merge([box] + [b for b, _ in subs]), merge([anchor_box] + [a for _, a in subs]))
+    return st.boxes
+
+def cached_family(mob):
+    st = state(mob)
+    if st.family is None:
+        family = [mob]
+        for sub in submobjects_of(mob):
+            family.extend(cached_family(sub))
+        # Last occurrence wins, like remove_list_redundancies
+        st.family = list(reversed(dict.fromkeys(reversed(family))))
+        st.empty_leaf = any(len(m.points) == 0 and not m.submobjects for m in st.family)
+    return st.family
+
+def boundary_box(mob):
+    """Box of get_points_defining_boundary(), None if empty, or False if
+    the class has its own idea of the boundary."""
+    boundary = type(mob).get_points_defining_boundary
+    box, anchor_box = family_boxes(mob)
+    if boundary is Mobject.get_points_defining_boundary:
+        return box
+    if boundary is VMobject.get_points_defining_boundary:
+        return anchor_box
+    return False
+
+def patched(original):
+    def get_family(self, recurse=True):
+        return list(cached_family(self))
+
+    def get_critical_point(self, direction):
+        box = boundary_box(self)
+        if box is False:
+            return original['get_critical_point'](self, direction)
+        if box is None:
+            return np.zeros(self.dim)
+        direction = np.asarray(direction)
+        center = (box[0] + box[1]) / 2
+        return np.where(direction < 0, box[0], np.where(direction > 0, box[1], center))
+
+    def reduce_across_dimension(self, reduce_func, dim):
+        # Empty leaves count as 0 in manim's version, leave those to it
+        if reduce_func not in (min, max) or (cached_family(self) and state(self).empty_leaf):
+            return original['reduce_across_dimension'](self, reduce_func, dim)
+        box, _ = family_boxes(self)
+        return box[0 if reduce_func is min else 1][dim]
+
+    return {
+        'get_family': get_family,
+        'get_critical_point': get_critical_point,
+        'reduce_across_dimension': reduce_across_dimension,
+    }
+
+def after(method, structure):
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if structure:
+            children_changed(self)
+        else:
+            invalidate(self)
+        return result
+    return wrapper
+
+# (class, method, changes structure) that modify points or submobjects in place
+IN_PLACE = [
+    (Mobject, 'insert', True),
+    (Mobject, 'remove', True),
+    (Mobject, 'sort', True),
+    (Mobject, 'shuffle', True),
+    (Mobject, 'invert', True),
+    (VGroup, '__setitem__', True),
+    (MathTex, 'sort_alphabetically', True),
+    (VMobject, 'set_anchors_and_handles', False),
+    (VMobject, 'pointwise_become_partial', False),
+    (ValueTracker, 'set_value', False),
+    (ComplexValueTracker, 'set_value', False),
+]
+
+def patch():
+    original = {name: getattr(Mobject, name) for name in
+                ('get_family', 'get_critical_point', 'reduce_across_dimension')}
+    changes = [(Mobject, name, method) for name, method in patched(original).items()]
+    changes += [
+        (Mobject, 'points', Tracked('points', invalidate)),
+        (Mobject, 'submobjects', Tracked('submobjects', children_changed)),
+    ]
+    changes += [(cls, name, after(getattr(cls, name), structure)) for cls, name, structure in IN_PLACE]
+    for cls, name, value in changes:
+        saved.append((cls, name, cls.__dict__.get(name)))
+        setattr(cls, name, value)
+
+def unpatch():
+    while saved:
+        cls, name, value = saved.pop()
+        if value is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, value)
+    states.clear()
+
+@contextmanager
+def cached_bounds():
+    global depth
+    if depth == 0:
+        patch()
+    depth += 1
+    try:
+        yield
+    finally:
+        depth -= 1
+        if depth == 0:
+            unpatch()
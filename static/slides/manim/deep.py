@@ -1,8 +1,19 @@
 from manim import *
+import atexit
+import contextlib
+import hashlib
+import inspect
+import os
 import random
+import time
+import wave
 import numpy as np
 import torch
 
+from assets import CachedImageMobject
+from audio import FEATURE_DIM, MEL_BANDS, AudioTimeline
+from bounds import cached_bounds
+
 # from manim_slides import Slide
 
 class DottedLine(Line):
@@ -64,6 +75,62 @@ class DottedLine(Line):
     def get_last_handle(self):
         return self.dot_points[-2]
 
+class FlowMarkers(VMobject):
+
+    """Triangles travelling along a straight path from ``start`` to ``end``.
+
+    All markers are subpaths of this one :class:`VMobject`. Their geometry is
+    computed once, each frame only offsets (and trims) that buffer by the
+    current phase, so many edges can flow at once.
+    Parameters
+    ----------
+    start, end : np.ndarray
+        Ends of the path.
+    spacing : float
+        Distance between markers.
+    speed : float
+        Travel speed in scene units per second.
+    kwargs : Any
+        Additional arguments to be passed to :class:`VMobject`
+    """
+
+    def __init__(self, start, end, spacing=0.4, speed=1.0, **kwargs):
+        super().__init__(fill_opacity=1, **kwargs)
+        start = np.array(start, dtype=float)
+        vect = np.array(end, dtype=float) - start
+        self.length = np.linalg.norm(vect)
+        self.unit = vect / self.length
+        self.spacing = spacing
+        self.speed = speed
+        self.phase = 0.0
+        angle = -PI / 2 + angle_of_vector(self.unit)
+        marker = Triangle().scale(0.15).rotate_about_origin(angle).points
+        self.points_per_marker = len(marker)
+        self.n_markers = int(self.length / spacing) + 1
+        offsets = start + np.outer(np.arange(self.n_markers) * spacing, self.unit)
+        self.base_points = (marker[None, :, :] + offsets[:, None, :]).reshape(-1, 3)
+        # Affine map (3x2) from construction coordinates to where we are now
+        self.placement = np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 0.0]])
+        self.local_points = self.base_points[:0]
+        self.set_phase(0.0)
+        self.add_updater(lambda m, dt: m.set_phase(m.phase + dt * m.speed / m.spacing))
+
+    def set_phase(self, phase):
+        n = self.points_per_marker
+        if len(self.points) >= n and len(self.local_points) >= n:
+            # Pick up any shift/scale/rotation applied since the last frame by
+            # comparing the first marker with where it was put.
+            src = np.c_[self.local_points[:n, :2], np.ones(n)]
+            self.placement = np.linalg.lstsq(src, self.points[:n, :2], rcond=None)[0]
+        self.phase = phase % 1.0
+        offset = self.phase * self.spacing
+        visible = clamp(int((self.length - offset) / self.spacing) + 1, 0, self.n_markers)
+        self.local_points = self.base_points[:visible * n] + offset * self.unit
+        points = np.zeros_like(self.local_points)
+        points[:, :2] = np.c_[self.local_points[:, :2], np.ones(len(self.local_points))] @ self.placement
+        self.points = points
+        return self
+
 class DirectedLine(Line):
 
     """A directional :class:`Line`.
@@ -75,6 +142,9 @@ class DirectedLine(Line):
         Minimal spacing of the triangles. The spacing is scaled up to fit the start and end of the line.
     triangle_kwargs : Any
         Arguments to be passed to ::class::`Triangle`
+    flow_speed : float
+        If nonzero the triangles travel along the line at this speed, see
+        :class:`FlowMarkers`
     kwargs : Any
         Additional arguments to be passed to :class:`Line`
     Examples
@@ -99,6 +169,7 @@ class DirectedLine(Line):
         *args,
         spacing=0.4,
         triangle_kwargs={},
+        flow_speed=0.0,
         **kwargs
     ):
         Line.__init__(self, *args, **kwargs)
@@ -110,7 +181,10 @@ class DirectedLine(Line):
         end = self.end
 
         self.dot_points = [start + unit_vector * dot_spacing * x for x in range(n_dots)]
-        self.dots = [Triangle(fill_opacity=1, **triangle_kwargs).scale(0.15).rotate_about_origin(angle).shift(point) for point in self.dot_points]
+        if flow_speed:
+            self.dots = [FlowMarkers(start, end, spacing=dot_spacing, speed=flow_speed, **triangle_kwargs)]
+        else:
+            self.dots = [Triangle(fill_opacity=1, **triangle_kwargs).scale(0.15).rotate_about_origin(angle).shift(point) for point in self.dot_points]
 
         self.clear_points()
 
@@ -145,10 +219,20 @@ def random_color(colors=None):
     alpha = random.random()
     return get_color(colors, alpha)
 
+def value_color(x):
+    alpha = clamp((x + 2.0) / 4.0, 0.0, 1.0)
+    return get_color(heatmap, alpha)
+
+heatmap_rgba = np.array([c.to_int_rgba() for c in heatmap], dtype=np.uint8)
+
+def heat_pixels(values, lo=-2.0, hi=2.0):
+    # Vectorized value_color() as RGBA pixels, for heatmap images
+    alpha = np.clip((np.asarray(values) - lo) / (hi - lo), 0.0, 1.0)
+    return heatmap_rgba[np.minimum((alpha * len(heatmap)).astype(int), len(heatmap) - 1)]
+
 def make_square(v=None):
     x = random_scalar() if v is None else v
-    alpha = clamp((x + 2.0) / 4.0, 0.0, 1.0)
-    color = get_color(heatmap, alpha)
+    color = value_color(x)
     vg = VGroup()
     square = Square(color=color, fill_opacity=1)
     text = Text(f"{x:.2f}")
@@ -156,6 +240,13 @@ def make_square(v=None):
     vg.add(text)
     return vg
 
+def set_square(vg, x):
+    # Reuse a make_square() group for another value
+    vg[0].set_color(value_color(x))
+    text = Text(f"{x:.2f}").scale(vg[0].width / 2.0).move_to(vg[1])
+    vg[1].become(text)
+    return vg
+
 def vstack(items):
     g = VGroup(items).set_x(0).set_y(0).arrange(direction=DOWN)
     return g
@@ -276,7 +367,7 @@ class LinearScene(Scene):
         fade.add(lines)
 
         act_boxes = VGroup([
-            Activation() for i in range(f_out)
+            component(Activation) for i in range(f_out)
         ]).set_x(0).set_y(0).set_z_index(1).arrange(direction=DOWN, buff=1.5).scale(0.2).next_to(h, RIGHT)
         self.play(Create(act_boxes))
         fade.add(act_boxes)
@@ -355,8 +446,7 @@ class MLP(Scene):
         self.play(Create(v))
         self.wait(1)
 
-        digit = ImageMobject("mnist3.png").scale(1.0).next_to(lbl_x, RIGHT).shift(RIGHT + DOWN * 0.5)
-        digit.set_resampling_algorithm(RESAMPLING_ALGORITHMS['nearest'])
+        digit = CachedImageMobject("mnist3.png", resampling='nearest').scale(1.0).next_to(lbl_x, RIGHT).shift(RIGHT + DOWN * 0.5)
         out = VGroup([
             VGroup([
                 Text('1' if i == 3 else '0'),
@@ -366,7 +456,52 @@ class MLP(Scene):
         self.play(Create(out))
         self.wait(1)
 
-def gru():
+# Component templates
+#
+# Building a component (especially anything with Text or Tex) is slow, copying
+# one is cheap. component() builds each distinct (class, arguments) once and
+# hands out copies of that template.
+#
+# COMPONENT_STATS=1 prints how long building and copying took at exit,
+# bench_bounds.py compares building gru() with and without templates.
+
+component_templates = {}
+component_stats = {}
+
+def component(cls, *args, cache_bounds=True, **kwargs):
+    # Templates are built inside cached_bounds() unless cache_bounds=False
+    key = (cls, args, tuple(sorted(kwargs.items())))
+    stats = component_stats.setdefault(cls.__name__, {
+        'built': 0, 'build_time': 0.0, 'copies': 0, 'copy_time': 0.0,
+    })
+    template = component_templates.get(key)
+    if template is None:
+        start = time.perf_counter()
+        with cached_bounds() if cache_bounds else contextlib.nullcontext():
+            template = cls(*args, **kwargs)
+        component_templates[key] = template
+        stats['built'] += 1
+        stats['build_time'] += time.perf_counter() - start
+    start = time.perf_counter()
+    obj = template.copy()
+    stats['copies'] += 1
+    stats['copy_time'] += time.perf_counter() - start
+    return obj
+
+def component_report():
+    for name, stats in sorted(component_stats.items()):
+        # Building every copy instead would have cost copies * time per build
+        per_build = stats['build_time'] / max(stats['built'], 1)
+        saved = stats['copies'] * per_build / max(stats['build_time'] + stats['copy_time'], 1e-9)
+        print(f"{name:>20}: built {stats['built']} in {stats['build_time'] * 1000:.1f}ms, "
+              f"{stats['copies']} copies in {stats['copy_time'] * 1000:.1f}ms, {saved:.1f}x faster")
+
+if os.environ.get('COMPONENT_STATS'):
+    atexit.register(component_report)
+
+@cached_bounds()
+def gru(flow=False, make=component):
+    # make(cls, *args, **kwargs) builds the parts
     v = VGroup()
     node_positions = [
         (-2, -1),   # 0
@@ -394,29 +529,29 @@ def gru():
         (0, 5),     # 22
     ]
     node_contents = [
-        LinearActivation(txt=r'Reset', inputs=2, activation_height=0.5),                 # 0
-        LinearActivation(txt=r'Update', inputs=2, activation_height=0.5),            # 1
-        LinearActivation(txt=r'Candidate', inputs=2, activation_height=0.5, tanh=True),    # 2
-        OpBox('⊙').scale(0.5),                                                          # 3
-        OpBox('⊙').scale(0.5),                                                          # 4
-        OpBox('⊙').scale(0.5),                                                          # 5
-        OpBox('1-').scale(0.5),                                                         # 6
-        OpBox('+').scale(0.5),                                                          # 7
-        Splitter(),                                                                     # 8
-        Splitter(),                                                                     # 9
-        Splitter(),                                                                     # 10
-        Splitter(),                                                                     # 11
-        Splitter(),                                                                     # 12
-        Splitter(),                                                                     # 13
-        Splitter(),                                                                     # 14
-        Splitter(),                                                                     # 15
-        Splitter(),                                                                     # 16
-        Splitter(),                                                                     # 17
-        Splitter(),                                                                     # 18
-        Splitter(),                                                                     # 19
-        TextBox(r'$h_t$'),                                                              # 20
-        TextBox(r'$h_{t-1}$'),                                                          # 21
-        TextBox(r'$x_t$'),                                                              # 22
+        make(LinearActivation, txt=r'Reset', inputs=2, activation_height=0.5),          # 0
+        make(LinearActivation, txt=r'Update', inputs=2, activation_height=0.5),         # 1
+        make(LinearActivation, txt=r'Candidate', inputs=2, activation_height=0.5, tanh=True),    # 2
+        make(OpBox, '⊙').scale(0.5),                                                    # 3
+        make(OpBox, '⊙').scale(0.5),                                                    # 4
+        make(OpBox, '⊙').scale(0.5),                                                    # 5
+        make(OpBox, '1-').scale(0.5),                                                   # 6
+        make(OpBox, '+').scale(0.5),                                                    # 7
+        make(Splitter),                                                                 # 8
+        make(Splitter),                                                                 # 9
+        make(Splitter),                                                                 # 10
+        make(Splitter),                                                                 # 11
+        make(Splitter),                                                                 # 12
+        make(Splitter),                                                                 # 13
+        make(Splitter),                                                                 # 14
+        make(Splitter),                                                                 # 15
+        make(Splitter),                                                                 # 16
+        make(Splitter),                                                                 # 17
+        make(Splitter),                                                                 # 18
+        make(Splitter),                                                                 # 19
+        make(TextBox, r'$h_t$'),                                                        # 20
+        make(TextBox, r'$h_{t-1}$'),                                                    # 21
+        make(TextBox, r'$x_t$'),                                                        # 22
     ]
     node_edges = [
         ((0, 0), (3, 0)),
@@ -461,6 +596,8 @@ def gru():
         end = node_contents[j].get_inputs()[j_n]
         line = Line(start, end, buff=0, stroke_width=4.0)
         v.add(line)
+        if flow:
+            v.add(FlowMarkers(start, end, color=YELLOW, stroke_width=0))
     v.scale(0.5)
     return v
 
@@ -471,6 +608,12 @@ class GRUScene(Scene):
         self.wait(1)
         self.play(Create(g, run_time=6.0))
 
+class GRUFlow(Scene):
+    def construct(self):
+        g = gru(flow=True).shift(UP * 2.7)
+        self.add(g)
+        self.wait(6)
+
 class LinearBox(VGroup):
     def __init__(self, inputs=1, txt=r"$d_{in}, d_{out}$"):
         linear = VGroup(
@@ -532,21 +675,243 @@ class LipSyncGRU(Scene):
         self.play(Create(ls))
         self.wait(1)
 
+def lip_sync_gru2(flow=False):
+    """The two layer lip sync model, with values flowing through it if flow."""
+    gb = GRUBox(txt2=r'$26, 80$')
+    gb2 = GRUBox(txt2=r'$80, 80$').next_to(gb, DOWN)
+    lbl_x = Tex(r'$x_t$').next_to(gb, UP)
+    l = LinearBox(txt=r'$80, 12$').next_to(gb2, DOWN).shift(RIGHT * 0.1)
+    c1 = Line(gb.get_outputs()[0], gb2.get_inputs()[0])
+    c2 = Line(gb2.get_outputs()[0], l.get_inputs()[0])
+    lbl_y = Tex(r'$y_t$').next_to(l, DOWN)
+    ls = VGroup(lbl_x, gb, c1, gb2, c2, l, lbl_y)
+    if flow:
+        edges = [(lbl_x.get_bottom(), gb.get_inputs()[0]), (c1.get_start(), c1.get_end()),
+                 (c2.get_start(), c2.get_end()), (l.get_outputs()[0], lbl_y.get_top())]
+        ls.add(VGroup(*[FlowMarkers(start, end, spacing=0.15, speed=0.3, color=YELLOW, stroke_width=0)
+                        for start, end in edges]).set_z_index(2))
+    return ls.center().shift(DOWN * 0.5).scale(0.9)
+
 class LipSyncGRU2(Scene):
     def construct(self):
         self.play(Create(Text("Lip Sync Model (v2)").shift(UP * 3)))
         self.wait(1)
-        gb = GRUBox(txt2=r'$26, 80$')
-        gb2 = GRUBox(txt2=r'$80, 80$').next_to(gb, DOWN)
-        lbl_x = Tex(r'$x_t$').next_to(gb, UP)
-        l = LinearBox(txt=r'$80, 12$').next_to(gb2, DOWN).shift(RIGHT * 0.1)
-        c1 = Line(gb.get_outputs()[0], gb2.get_inputs()[0])
-        c2 = Line(gb2.get_outputs()[0], l.get_inputs()[0])
-        lbl_y = Tex(r'$y_t$').next_to(l, DOWN)
-        ls = VGroup(lbl_x, gb, c1, gb2, c2, l, lbl_y).center().shift(DOWN * 0.5).scale(0.9)
-        self.play(Create(ls))
+        self.play(Create(lip_sync_gru2()))
         self.wait(1)
 
+class LipSyncGRUFlow(Scene):
+    def construct(self):
+        self.add(Text("Lip Sync Model (v2)").shift(UP * 3))
+        self.add(lip_sync_gru2(flow=True))
+        self.wait(6)
+
+def gru_features(steps=120, dim=26, seed=1234):
+    """Input features for the lip sync models, (steps, dim).
+
+    Loads GRU_FEATURES (a .npy of audio features) when set, otherwise makes
+    up smooth, speech-like bands so the scenes render anywhere.
+    """
+    path = os.environ.get('GRU_FEATURES')
+    if path:
+        return np.load(path)[:steps, :dim].astype(np.float32)
+    rng = np.random.default_rng(seed)
+    t = np.arange(steps)[:, None]
+    envelope = np.clip(np.sin(t / 9.0) + rng.normal(0, 0.3, (steps, 1)), 0, None)
+    bands = np.sin(t / rng.uniform(2, 12, dim) + rng.uniform(0, 2 * np.pi, dim))
+    return (envelope * bands + rng.normal(0, 0.1, (steps, dim))).astype(np.float32)
+
+def gru_trace(x, sizes=(26, 80, 80), outputs=12, seed=1234):
+    """Run a stacked GRU plus linear output over the whole sequence x once.
+
+    Returns ([{'r', 'z', 'n', 'h'} per layer, each (steps, hidden)], y) as
+    numpy arrays, so animations index into them instead of running the
+    model per frame. The input projections of a layer are one matmul over
+    all steps; only the small hidden matmul is sequential. Matches
+    torch.nn.GRU with the same weights.
+    """
+    torch.manual_seed(seed)
+    model = torch.nn.GRU(sizes[0], sizes[1], num_layers=len(sizes) - 1)
+    linear = torch.nn.Linear(sizes[-1], outputs)
+    layers = []
+    with torch.no_grad():
+        inputs = torch.as_tensor(x)
+        for i, hidden in enumerate(sizes[1:]):
+            w_ih, w_hh = getattr(model, f'weight_ih_l{i}'), getattr(model, f'weight_hh_l{i}')
+            b_ih, b_hh = getattr(model, f'bias_ih_l{i}'), getattr(model, f'bias_hh_l{i}')
+            gx = inputs @ w_ih.T + b_ih
+            gates = {name: torch.empty(len(inputs), hidden) for name in 'rznh'}
+            h = torch.zeros(hidden)
+            for t in range(len(inputs)):
+                gh = w_hh @ h + b_hh
+                r = torch.sigmoid(gx[t, :hidden] + gh[:hidden])
+                z = torch.sigmoid(gx[t, hidden:2 * hidden] + gh[hidden:2 * hidden])
+                n = torch.tanh(gx[t, 2 * hidden:] + r * gh[2 * hidden:])
+                h = (1 - z) * n + z * h
+                for name, value in zip('rznh', (r, z, n, h)):
+                    gates[name][t] = value
+            layers.append({name: value.numpy() for name, value in gates.items()})
+            inputs = gates['h']
+        y = linear(inputs).numpy()
+    return layers, y
+
+class GRUInference(Scene):
+    # Model dimensions and which GRU layer the cell diagram shows
+    sizes = (26, 32)
+    layer = -1
+    steps = 120
+    step_time = 0.1
+
+    def construct(self):
+        x = gru_features(self.steps, self.sizes[0])
+        layers, y = gru_trace(x, self.sizes)
+        trace = layers[self.layer]
+        # All colors up front, frames only pick rows
+        h_prev = np.vstack([np.zeros_like(trace['h'][:1]), trace['h'][:-1]])
+        strips = {
+            'x': heat_pixels(x),
+            'r': heat_pixels(trace['r'], 0.0, 1.0),
+            'z': heat_pixels(trace['z'], 0.0, 1.0),
+            'n': heat_pixels(trace['n'], -1.0, 1.0),
+            'h_prev': heat_pixels(h_prev, -1.0, 1.0),
+            'h': heat_pixels(trace['h'], -1.0, 1.0),
+        }
+        history = heat_pixels(trace['h'], -1.0, 1.0).transpose(1, 0, 2)
+        outputs = heat_pixels(y, -1.0, 1.0).transpose(1, 0, 2)
+
+        self.add(Text(f"GRU {', '.join(map(str, self.sizes))}").scale(0.6).to_corner(UL))
+        g = gru().shift(UP * 2.7 + LEFT * 3)
+        self.add(g)
+
+        def strip(key, node, direction):
+            mob = ImageMobject(strips[key][:1]).set_resampling_algorithm(RESAMPLING_ALGORITHMS['nearest'])
+            mob.stretch_to_fit_width(1.6).stretch_to_fit_height(0.15)
+            mob.next_to(g[node + 1], direction, buff=0.1).set_z_index(2)
+            mob.key = key
+            return mob
+
+        # g[0] is the frame, nodes follow in gru() order
+        gate_strips = Group(
+            strip('r', 0, LEFT),
+            strip('z', 1, RIGHT),
+            strip('n', 2, LEFT),
+            strip('h', 20, RIGHT),
+            strip('h_prev', 21, LEFT),
+            strip('x', 22, RIGHT),
+        )
+
+        def timeline(pixels, height):
+            blank = np.zeros_like(pixels)
+            mob = ImageMobject(blank).set_resampling_algorithm(RESAMPLING_ALGORITHMS['nearest'])
+            mob.stretch_to_fit_width(5.5).stretch_to_fit_height(height)
+            mob.source = pixels
+            mob.drawn = 0
+            return mob
+
+        h_timeline = timeline(history, 3.0)
+        y_timeline = timeline(outputs, 1.2)
+        timelines = Group(h_timeline, y_timeline).arrange(DOWN, buff=0.6).to_edge(RIGHT)
+        self.add(
+            timelines,
+            Tex('$h_t$').next_to(h_timeline, LEFT),
+            Tex('$y_t$').next_to(y_timeline, LEFT),
+        )
+
+        step = ValueTracker(0)
+
+        def current():
+            return min(int(step.get_value()), self.steps - 1)
+
+        def update_strip(mob):
+            mob.pixel_array = strips[mob.key][current()][None]
+
+        def update_timeline(mob):
+            # Reveal columns up to the current step, only the new ones are copied
+            t = current() + 1
+            if t > mob.drawn:
+                mob.pixel_array[:, mob.drawn:t] = mob.source[:, mob.drawn:t]
+                mob.drawn = t
+
+        for mob in gate_strips:
+            mob.add_updater(update_strip)
+        for mob in timelines:
+            mob.add_updater(update_timeline)
+        self.add(gate_strips)
+        self.wait(1)
+        self.play(step.animate.set_value(self.steps - 1), run_time=self.steps * self.step_time, rate_func=linear)
+        self.wait(1)
+
+class LipSyncGRUInference(GRUInference):
+    sizes = (26, 80, 80)
+
+def lipsync_wav(seconds=4.0, rate=16000, seed=1234):
+    """Path of the clip for LipSyncAudio.
+
+    LIPSYNC_WAV when set, otherwise a made up voice (syllables of a buzzy
+    tone with a wandering pitch) written once to the media directory.
+    """
+    path = os.environ.get('LIPSYNC_WAV')
+    if path:
+        return path
+    path = config.get_dir('media_dir') / 'audio' / f'synthetic-{seed}.wav'
+    if not path.exists():
+        rng = np.random.default_rng(seed)
+        t = np.arange(int(seconds * rate)) / rate
+        syllables = np.clip(np.sin(2 * np.pi * rng.uniform(2, 3) * t + np.sin(2 * np.pi * 0.3 * t)), 0, None) ** 2
+        phase = 2 * np.pi * np.cumsum(140 + 30 * np.sin(2 * np.pi * 0.5 * t)) / rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 12)) + rng.normal(0, 0.05, len(t))
+        samples = np.clip(0.25 * syllables * voice, -1, 1)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes((samples * 32767).astype('<i2').tobytes())
+    return path
+
+class LipSyncAudio(Scene):
+    # LIPSYNC_OUTPUTS: optional .npy of model outputs, one row per 10 ms
+    def construct(self):
+        timeline = AudioTimeline(lipsync_wav(), outputs=os.environ.get('LIPSYNC_OUTPUTS'))
+        mean, std = timeline.stats()
+        self.add(Text("Audio features").scale(0.6).to_corner(UL))
+
+        def bars(count, width):
+            g = VGroup(*[Rectangle(width=width, height=0.1, stroke_width=0, fill_opacity=1) for _ in range(count)])
+            return g.arrange(RIGHT, buff=0.05, aligned_edge=DOWN)
+
+        def follow(bar, tracker, normalize):
+            def update(mob):
+                x = normalize(tracker.get_value())
+                mob.stretch_to_fit_height(0.1 + 0.6 * clamp(x + 2, 0, 4), about_edge=DOWN)
+                mob.set_fill(value_color(x))
+            bar.add_updater(update)
+
+        timeline.bind(self)
+        x_bars = bars(FEATURE_DIM, 0.15).shift(LEFT * 2.5 + DOWN * 1.5)
+        for i, bar in enumerate(x_bars):
+            follow(bar, timeline.feature_tracker(i), lambda v, i=i: (v - mean[i]) / (std[i] + 1e-6))
+        self.add(x_bars, Tex('$x_t$').next_to(x_bars, DOWN))
+
+        # Mouth opens with the loudness (mean of the log mel bands)
+        loudness = timeline.tracker(lambda step: float(timeline.features(step)[:MEL_BANDS].mean()))
+        level = mean[:MEL_BANDS].mean()
+        spread = std[:MEL_BANDS].mean() + 1e-6
+        mouth = Ellipse(width=1.6, height=0.1, color=RED_E, fill_opacity=1).shift(RIGHT * 3 + UP * 1.5)
+
+        def open_mouth(mob):
+            x = clamp((loudness.get_value() - level) / spread + 1, 0, 3)
+            mob.stretch_to_fit_height(0.05 + 0.4 * x)
+
+        mouth.add_updater(open_mouth)
+        self.add(mouth)
+
+        if timeline.outputs is not None:
+            y_bars = bars(timeline.outputs.shape[1], 0.25).shift(RIGHT * 3 + DOWN * 1.5)
+            for i, bar in enumerate(y_bars):
+                follow(bar, timeline.output_tracker(i), lambda v: 4 * v - 2)
+            self.add(y_bars, Tex('$y_t$').next_to(y_bars, DOWN))
+        self.wait(timeline.duration)
+
 class TimeSeries(Scene):
     def construct(self):
         n = 5
@@ -591,6 +956,99 @@ class TimeSeries(Scene):
         self.play(Create(h_ts[n]))
         self.play(Create(Arrow(start=DOWN, end=UP * 0.8).scale(0.8).next_to(h_ts[n], UP, buff=0)))
 
+class UnrolledSequence(VGroup):
+    """Horizontal sequence of ``length`` steps of which only the ones inside
+    (or ``margin`` steps beyond) the camera frame exist as mobjects.
+
+    ``make_step(i)`` builds step ``i``. When given, ``update_step(mob, i)``
+    turns a step that scrolled out of view into step ``i`` instead of building
+    a new one. Step ``i`` is centered at ``start + i * step_width * RIGHT``;
+    move the sequence with its own shift(), not through a parent group.
+    """
+    def __init__(self, length, make_step, frame, step_width=1.0,
+                 start=ORIGIN, margin=1, update_step=None):
+        super().__init__()
+        self.length = length
+        self.make_step = make_step
+        self.update_step = update_step
+        self.frame = frame
+        self.step_width = step_width
+        self.start = np.array(start, dtype=float)
+        self.margin = margin
+        self.live = {}
+        self.pool = []
+        self.refresh()
+        self.add_updater(lambda m: m.refresh())
+
+    def step_position(self, i):
+        return self.start + RIGHT * i * self.step_width
+
+    def shift(self, *vectors):
+        super().shift(*vectors)
+        self.start += sum(vectors)
+        return self
+
+    def refresh(self):
+        left = (self.frame.get_left()[0] - self.start[0]) / self.step_width
+        right = (self.frame.get_right()[0] - self.start[0]) / self.step_width
+        lo = clamp(int(np.floor(left)) - self.margin, 0, self.length)
+        hi = clamp(int(np.ceil(right)) + self.margin + 1, 0, self.length)
+        for i in [i for i in self.live if not lo <= i < hi]:
+            mob = self.live.pop(i)
+            self.remove(mob)
+            # Without update_step a step can not be reused, let it go
+            if self.update_step is not None:
+                self.pool.append(mob)
+        for i in range(lo, hi):
+            if i in self.live:
+                continue
+            if self.pool:
+                mob = self.update_step(self.pool.pop(), i)
+            else:
+                mob = self.make_step(i)
+            self.live[i] = mob.move_to(self.step_position(i))
+            self.add(mob)
+        return self
+
+class TimeSeriesLong(Scene):
+    def __init__(self, **kwargs):
+        super().__init__(camera_class=MovingCamera, **kwargs)
+
+    def construct(self):
+        n = 300
+        f = 6
+        fh = 3
+        rng = np.random.default_rng(124)
+        xs = rng.normal(size=(n, f))
+        hs = rng.normal(size=(n, fh))
+        frame = self.camera.frame
+
+        def make_step(i):
+            x = vstack([make_square(v) for v in xs[i]]).scale(0.3)
+            h = vstack([make_square(v) for v in hs[i]]).scale(0.3)
+            o = op_box("").scale(0.2)
+            return VGroup(
+                h,
+                Arrow(start=DOWN, end=UP, buff=0).scale(0.3),
+                o,
+                Arrow(start=DOWN, end=UP, buff=0).scale(0.3),
+                x,
+            ).arrange(direction=DOWN, buff=0.1)
+
+        def update_step(step, i):
+            for square, v in zip(step[0], hs[i]):
+                set_square(square, v)
+            for square, v in zip(step[4], xs[i]):
+                set_square(square, v)
+            return step
+
+        seq = UnrolledSequence(n, make_step, frame, step_width=1.2,
+                               start=LEFT * 6, update_step=update_step)
+        self.add(seq)
+        self.wait(1)
+        self.play(frame.animate.shift(RIGHT * 1.2 * (n - 11)), run_time=30, rate_func=linear)
+        self.wait(1)
+
 class TimeSeriesShift(Scene):
     def construct(self):
 
@@ -656,6 +1114,17 @@ def train():
     global b_history
     global loss_history
 
+    # Training is deterministic, so keep its results next to the renders
+    cache = train_cache_dir() / f'train-{source_hash(train)}.npz'
+    if cache.exists():
+        saved = np.load(cache)
+        data_x = torch.tensor(saved['data_x'])
+        data_y = torch.tensor(saved['data_y'])
+        m_history = saved['m_history'].tolist()
+        b_history = saved['b_history'].tolist()
+        loss_history = saved['loss_history'].tolist()
+        return
+
     xpts = np.linspace(0, 20, 100) + np.random.normal(0.0, 1.0, 100)
     m_actual = np.random.normal(0.0, 1.0)
     b_actual = np.random.normal(0.0, 5.0)
@@ -711,6 +1180,120 @@ def train():
         if (epoch) % 100 == 0:
             print('loss: ', loss.item(), model.linear.weight.item(), model.linear.bias.item())
 
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(cache, data_x=data_x.numpy(), data_y=data_y.numpy(), m_history=m_history,
+             b_history=b_history, loss_history=loss_history)
+
+def train_cache_dir():
+    return config.get_dir('media_dir') / 'train'
+
+def source_hash(func):
+    return hashlib.sha1(inspect.getsource(func).encode()).hexdigest()[:12]
+
+def loss_grid(ms, bs, chunk=256):
+    # MSE of y = m x + b on the training data for every (m, b) pair. Expanding
+    # the square leaves five sums over the data, so a grid costs O(grid) and
+    # chunks of rows keep the temporaries small.
+    x = np.asarray(data_x, dtype=float)
+    y = np.asarray(data_y, dtype=float)
+    n = len(x)
+    sx, sy, sxx, sxy, syy = x.sum(), y.sum(), x @ x, x @ y, y @ y
+    out = np.empty((len(ms), len(bs)))
+    b = np.asarray(bs, dtype=float)[None, :]
+    for i in range(0, len(ms), chunk):
+        m = np.asarray(ms[i:i + chunk], dtype=float)[:, None]
+        out[i:i + chunk] = (m * m * sxx + 2 * m * b * sx + n * b * b - 2 * m * sxy - 2 * b * sy + syy) / n
+    return out
+
+def loss_landscape(m_range, b_range, resolution=2000):
+    ms = np.linspace(*m_range, resolution)
+    bs = np.linspace(*b_range, resolution)
+    key = hashlib.sha1(f'{source_hash(train)}:{m_range}:{b_range}:{resolution}'.encode()).hexdigest()[:12]
+    cache = train_cache_dir() / f'loss-{key}.npy'
+    if cache.exists():
+        return ms, bs, np.load(cache)
+    grid = loss_grid(ms, bs)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    np.save(cache, grid)
+    return ms, bs, grid
+
+def landscape_image(axes, grid, m_range, b_range, colors):
+    """Loss grid as filled contours under axes: log loss quantized to colors."""
+    levels = np.log(grid)
+    levels = (levels - levels.min()) / (levels.max() - levels.min())
+    palette = np.array([c.to_int_rgba() for c in colors], dtype=np.uint8)
+    index = np.minimum((levels * len(palette)).astype(int), len(palette) - 1)
+    # Rows of the image go down in b, columns right in m
+    landscape = ImageMobject(palette[index].transpose(1, 0, 2)[::-1])
+    landscape.stretch_to_fit_width(axes.c2p(m_range[1], 0)[0] - axes.c2p(m_range[0], 0)[0])
+    landscape.stretch_to_fit_height(axes.c2p(0, b_range[1])[1] - axes.c2p(0, b_range[0])[1])
+    return landscape.move_to(axes.c2p(sum(m_range) / 2, sum(b_range) / 2))
+
+def padded_range(values, pad=0.2):
+    lo, hi = min(values), max(values)
+    return lo - (hi - lo) * pad, hi + (hi - lo) * pad
+
+# (label, optimizer, learning rate) for train_many
+optimizer_configs = [
+    ('SGD 0.001', 'sgd', 0.001),
+    ('SGD 0.005', 'sgd', 0.005),
+    ('Momentum 0.0005', 'momentum', 0.0005),
+    ('Adam 0.01', 'adam', 0.01),
+    ('Adam 0.05', 'adam', 0.05),
+]
+
+def train_many(configs=optimizer_configs, epochs=3500, momentum=0.9, betas=(0.9, 0.999), eps=1e-8):
+    """Train one linear model per config on the train() data, all at once.
+
+    The K models are the rows of one (K, 2) parameter tensor, so every step
+    is a single forward and backward pass, and the optimizer updates are
+    vectorized over rows with a per row learning rate. Returns an array of
+    shape (K, epochs, 3) holding m, b and loss after every step.
+    """
+    train()
+    key = hashlib.sha1(f'{source_hash(train_many)}:{configs}:{epochs}'.encode()).hexdigest()[:12]
+    cache = train_cache_dir() / f'many-{key}.npy'
+    if cache.exists():
+        return np.load(cache)
+
+    torch.manual_seed(1234)
+    k = len(configs)
+    x = data_x[None, :]
+    y = data_y[None, :]
+    # Same initialization for everyone so only the optimizer differs
+    start = torch.nn.Linear(1, 1)
+    params = torch.tensor([[start.weight.item(), start.bias.item()]] * k, requires_grad=True)
+    lr = torch.tensor([c[2] for c in configs])[:, None]
+    kind = [c[1] for c in configs]
+    use_momentum = torch.tensor([c == 'momentum' for c in kind])[:, None]
+    use_adam = torch.tensor([c == 'adam' for c in kind])[:, None]
+    velocity = torch.zeros_like(params)
+    m1 = torch.zeros_like(params)
+    m2 = torch.zeros_like(params)
+
+    history = np.empty((k, epochs, 3))
+    for epoch in range(epochs):
+        params.grad = None
+        pred = params[:, :1] * x + params[:, 1:]
+        # Rows are independent, so the gradient of the sum is each row's own
+        loss = ((pred - y) ** 2).mean(dim=1)
+        loss.sum().backward()
+        with torch.no_grad():
+            grad = params.grad
+            velocity = momentum * velocity + grad
+            m1 = betas[0] * m1 + (1 - betas[0]) * grad
+            m2 = betas[1] * m2 + (1 - betas[1]) * grad * grad
+            adam = (m1 / (1 - betas[0] ** (epoch + 1))) \
+                / ((m2 / (1 - betas[1] ** (epoch + 1))).sqrt() + eps)
+            step = torch.where(use_adam, adam, torch.where(use_momentum, velocity, grad))
+            params -= lr * step
+        history[:, epoch, :2] = params.detach().numpy()
+        history[:, epoch, 2] = loss.detach().numpy()
+
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    np.save(cache, history)
+    return history
+
 class Loss(Scene):
     def construct(self):
         train()
@@ -824,3 +1407,87 @@ class SGD(Scene):
             line.set_opacity(1.0)
             self.play(Transform(plot[-2][0], line))
         self.wait(1)
+
+class LossLandscape(Scene):
+    def construct(self):
+        train()
+        m_range = padded_range(m_history)
+        b_range = padded_range(b_history)
+        ms, bs, grid = loss_landscape(m_range, b_range)
+
+        lbl = MathTex(r'L( m, b ) = \frac{1}{n} \sum_i \left( m x_i + b - y_i \right)^2')
+        lbl.shift(UP * 3.3)
+        axes = Axes(
+            x_range=[*m_range, (m_range[1] - m_range[0]) / 4],
+            y_range=[*b_range, (b_range[1] - b_range[0]) / 4],
+            x_length=9,
+            y_length=5.5,
+            axis_config={'color': GREEN},
+            tips=False,
+        ).shift(DOWN * 0.4)
+        axes_labels = axes.get_axis_labels(x_label='m', y_label='b')
+
+        landscape = landscape_image(axes, grid, m_range, b_range, heatmap)
+
+        self.play(Create(lbl))
+        self.play(Create(VGroup(axes, axes_labels)))
+        self.play(FadeIn(landscape))
+        self.wait(1)
+
+        path = VMobject(color=WHITE, stroke_width=3.0).set_points_as_corners([
+            axes.c2p(m, b) for m, b in zip(m_history[::10], b_history[::10])
+        ])
+        dot = Dot(path.get_start(), color=YELLOW).set_z_index(1)
+        self.play(Create(path), MoveAlongPath(dot, path), run_time=6, rate_func=linear)
+        self.wait(1)
+
+class OptimizerRace(Scene):
+    def construct(self):
+        history = train_many()
+        labels = [c[0] for c in optimizer_configs]
+        colors = [RED, ORANGE, YELLOW, TEAL, BLUE]
+        # Frame what the models visit, ignoring far outliers
+        m_range = padded_range(np.percentile(history[:, :, 0], [1, 99]))
+        b_range = padded_range(np.percentile(history[:, :, 1], [1, 99]))
+        ms, bs, grid = loss_landscape(m_range, b_range, resolution=1000)
+
+        axes = Axes(
+            x_range=[*m_range, (m_range[1] - m_range[0]) / 4],
+            y_range=[*b_range, (b_range[1] - b_range[0]) / 4],
+            x_length=8,
+            y_length=6,
+            axis_config={'color': GREEN},
+            tips=False,
+        ).shift(LEFT * 1.8)
+        axes_labels = axes.get_axis_labels(x_label='m', y_label='b')
+
+        landscape = landscape_image(axes, grid, m_range, b_range, bwheatmap).set_opacity(0.5)
+
+        legend = VGroup(*[
+            VGroup(Dot(color=color), Text(label, font_size=24)).arrange(RIGHT)
+            for label, color in zip(labels, colors)
+        ]).arrange(DOWN, aligned_edge=LEFT).to_edge(RIGHT)
+
+        self.play(Create(VGroup(axes, axes_labels)), FadeIn(landscape))
+        self.play(FadeIn(legend))
+        self.wait(1)
+
+        def clip_point(m, b):
+            return axes.c2p(np.clip(m, *m_range), np.clip(b, *b_range))
+
+        epoch = ValueTracker(0)
+        steps = history.shape[1]
+        paths = VGroup()
+        dots = VGroup()
+        for i, color in enumerate(colors):
+            path = VMobject(color=color, stroke_width=3.0)
+            points = [clip_point(m, b) for m, b, _ in history[i, ::10]]
+            path.add_updater(lambda p, points=points: p.set_points_as_corners(
+                points[:max(2, int(epoch.get_value()) // 10 + 1)]))
+            dot = Dot(color=color).set_z_index(1)
+            dot.add_updater(lambda d, i=i: d.move_to(clip_point(*history[i, min(int(epoch.get_value()), steps - 1), :2])))
+            paths.add(path)
+            dots.add(dot)
+        self.add(paths, dots)
+        self.play(epoch.animate.set_value(steps - 1), run_time=10, rate_func=linear)
+        self.wait(1)
@@ -0,0 +1,155 @@
+import numpy as np
+
+# Draft rasterizer for fast previews
+#
+# Replaces Cairo for VMobjects with a few whole-batch NumPy passes: every
+# bezier of every mobject in a batch is flattened at once, fills are even-odd
+# scanline spans, strokes are sampled segments, and everything is written to
+# the pixel array in painter's order with one indexed assignment. No
+# antialiasing, approximate stroke widths and translucency. Enable with
+#
+#   FASTRENDER_DRAFT=2 python fastrender.py deep.py GRUScene -ql
+#
+# where the number is the resolution divisor.
+
+CURVE_SAMPLES = 6
+
+# Bernstein weights of a cubic for CURVE_SAMPLES + 1 evenly spaced t
+_t = np.linspace(0, 1, CURVE_SAMPLES + 1)[:, None]
+BERNSTEIN = np.hstack([(1 - _t) ** 3, 3 * (1 - _t) ** 2 * _t, 3 * (1 - _t) * _t ** 2, _t ** 3])
+
+def expand(counts):
+    """For counts [2, 0, 3] return ([0, 0, 2, 2, 2], [0, 1, 0, 1, 2])."""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return owner, np.arange(len(owner)) - starts[owner]
+
+def flatten(curves):
+    """(n, 4, 2) cubic control points -> (n, CURVE_SAMPLES + 1, 2) polyline."""
+    return np.einsum('sk,nkd->nsd', BERNSTEIN, curves)
+
+def fill_pixels(seg, seg_mob, height, width):
+    """Pixels inside closed polygons given as segments (n, 2, 2) with the
+    index of the mobject each belongs to. Returns (row, col, mob)."""
+    (x0, y0), (x1, y1) = seg[:, 0].T, seg[:, 1].T
+    keep = y0 != y1
+    x0, y0, x1, y1, mob = x0[keep], y0[keep], x1[keep], y1[keep], seg_mob[keep]
+    # Rows whose centers the segment crosses
+    lo = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, height).astype(int)
+    hi = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, height).astype(int)
+    owner, k = expand(hi - lo)
+    row = lo[owner] + k
+    x = x0[owner] + (row + 0.5 - y0[owner]) * (x1 - x0)[owner] / (y1 - y0)[owner]
+    mob = mob[owner]
+    # Pair up crossings of the same mobject on the same row (even-odd rule)
+    order = np.lexsort((x, row, mob))
+    x, row, mob = x[order], row[order], mob[order]
+    new_group = np.ones(len(x), dtype=bool)
+    new_group[1:] = (row[1:] != row[:-1]) | (mob[1:] != mob[:-1])
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(x)), 0))
+    rank = np.arange(len(x)) - group_start
+    first = np.flatnonzero((rank % 2 == 0)[:-1] & ~new_group[1:])
+    c0 = np.clip(np.ceil(x[first] - 0.5), 0, width).astype(int)
+    c1 = np.clip(np.ceil(x[first + 1] - 0.5), 0, width).astype(int)
+    owner, k = expand(np.maximum(c1 - c0, 0))
+    return row[first][owner], c0[owner] + k, mob[first][owner]
+
+def stroke_pixels(seg, seg_mob, radius, height, width):
+    """Pixels along segments (n, 2, 2), thickened by a per mobject radius."""
+    d = seg[:, 1] - seg[:, 0]
+    n = np.ceil(np.abs(d).max(axis=1)).astype(int) + 1
+    owner, k = expand(n)
+    p = seg[owner, 0] + d[owner] * (k / np.maximum(n[owner] - 1, 1))[:, None]
+    mob = seg_mob[owner]
+    r = radius[mob]
+    # Square brush of side 2r + 1 around every sample
+    owner, k = expand((2 * r + 1) ** 2)
+    side = (2 * r + 1)[owner]
+    col = np.floor(p[owner, 0]).astype(int) + k % side - r[owner]
+    row = np.floor(p[owner, 1]).astype(int) + k // side - r[owner]
+    ok = (row >= 0) & (row < height) & (col >= 0) & (col < width)
+    return row[ok], col[ok], mob[owner][ok]
+
+def paint(pixel_array, layers):
+    """Paint (row, col, rgba float) layers onto pixel_array in order, later
+    writes on top. Translucent colors blend with what was there before."""
+    height, width = pixel_array.shape[:2]
+    flat = pixel_array.reshape(-1, 4)
+    index = np.concatenate([row * width + col for row, col, _ in layers])
+    if len(index) == 0:
+        return
+    rgba = np.concatenate([color for _, _, color in layers])
+    alpha = rgba[:, 3:]
+    under = flat[index].astype(float)
+    value = rgba * 255 * alpha + under * (1 - alpha)
+    value[:, 3] = 255 * alpha[:, 0] + under[:, 3] * (1 - alpha[:, 0])
+    flat[index] = np.clip(value, 0, 255).astype(np.uint8)
+
+class DraftCameraMixin:
+    def display_multiple_vectorized_mobjects(self, vmobjects, pixel_array):
+        vmobjects = [vm for vm in vmobjects if len(vm.points) >= 4]
+        if not vmobjects:
+            return
+        height, width = pixel_array.shape[:2]
+        # Gather every curve of the batch into one array
+        counts = np.array([len(vm.points) // 4 for vm in vmobjects])
+        points = np.concatenate([vm.points[:4 * c] for vm, c in zip(vmobjects, counts)])
+        curves = points[:, :2].reshape(-1, 4, 2)
+        curve_mob = np.repeat(np.arange(len(vmobjects)), counts)
+        # Scene to pixel coordinates
+        center = np.asarray(self.frame_center)[:2]
+        scale = np.array([width / self.frame_width, -height / self.frame_height])
+        curves = (curves - center) * scale + np.array([width / 2, height / 2])
+
+        poly = flatten(curves)
+        seg = np.stack([poly[:, :-1], poly[:, 1:]], axis=2).reshape(-1, 2, 2)
+        seg_mob = np.repeat(curve_mob, CURVE_SAMPLES)
+        # Close every subpath for filling, as cairo does
+        starts_subpath = np.ones(len(curves), dtype=bool)
+        starts_subpath[1:] = (np.abs(curves[1:, 0] - curves[:-1, 3]).max(axis=1) > 1e-3) \
+            | (curve_mob[1:] != curve_mob[:-1])
+        first = np.flatnonzero(starts_subpath)
+        last = np.append(first[1:], len(curves)) - 1
+        closing = np.stack([curves[last, 3], curves[first, 0]], axis=1)
+        fill_seg = np.concatenate([seg, closing])
+        fill_mob = np.concatenate([seg_mob, curve_mob[first]])
+
+        fill_rgba = np.array([self.get_fill_rgbas(vm)[0] for vm in vmobjects], dtype=float)
+        stroke_rgba = np.array([self.get_stroke_rgbas(vm)[0] for vm in vmobjects], dtype=float)
+        stroke_px = np.array([vm.get_stroke_width() for vm in vmobjects], dtype=float) \
+            * self.cairo_line_width_multiple * width / self.frame_width
+        stroke_rgba[stroke_px == 0, 3] = 0
+        radius = np.clip(np.round(stroke_px / 2 - 0.5), 0, 3).astype(int)
+
+        fill_row, fill_col, fill_mob = fill_pixels(fill_seg, fill_mob, height, width)
+        stroke_row, stroke_col, stroke_mob = stroke_pixels(seg, seg_mob, radius, height, width)
+        row = np.concatenate([fill_row, stroke_row])
+        col = np.concatenate([fill_col, stroke_col])
+        mob = np.concatenate([fill_mob, stroke_mob])
+        is_stroke = np.arange(len(row)) >= len(fill_row)
+        rgba = np.where(is_stroke[:, None], stroke_rgba[mob], fill_rgba[mob])
+        # Painter's order: by mobject, fill before stroke
+        order = np.argsort(mob * 2 + is_stroke, kind='stable')
+        order = order[rgba[order, 3] > 0]
+        row, col, rgba = row[order], col[order], rgba[order]
+        paint(pixel_array, [(row, col, rgba)])
+
+    def draft_frame(self, frame):
+        # Nearest neighbour upscale to the output resolution
+        height, width = self.output_shape
+        frame = frame.repeat(self.divisor, axis=0).repeat(self.divisor, axis=1)
+        return np.ascontiguousarray(frame[:height, :width])
+
+def draft_camera_class(camera_class, divisor, output_shape):
+    height, width = output_shape
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('pixel_height', -(-height // divisor))
+        kwargs.setdefault('pixel_width', -(-width // divisor))
+        camera_class.__init__(self, **kwargs)
+
+    return type(f"Draft{camera_class.__name__}", (DraftCameraMixin, camera_class), {
+        '__init__': __init__,
+        'output_shape': output_shape,
+        'divisor': divisor,
+    })
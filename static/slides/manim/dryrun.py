@@ -0,0 +1,130 @@
+from manim import *
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.mobject.types import image_mobject
+from manim.utils import images
+from manim.utils.module_ops import get_module, get_scene_classes_from_module
+from pathlib import Path
+from PIL import Image
+import argparse
+import json
+import tempfile
+import time
+import traceback
+
+# Run scenes without rasterizing or encoding anything and report what they do.
+#
+#   python dryrun.py deep.py examples.py
+#   python dryrun.py deep.py -s GRUScene SGD --json report.json
+
+class DryRunRenderer(CairoRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(skip_animations=True, **kwargs)
+        self.report = {
+            'duration': 0.0,
+            'plays': 0,
+            'animations': 0,
+            'peak_mobjects': 0,
+            'peak_points': 0,
+            'off_frame': [],
+        }
+        self.off_frame_ids = set()
+
+    def play(self, scene, *args, **kwargs):
+        scene.compile_animation_data(*args, **kwargs)
+        scene.begin_animations()
+        if not scene.is_current_animation_frozen_frame():
+            scene.play_internal(skip_rendering=True)
+        self.time += scene.duration
+        self.report['duration'] += scene.duration
+        self.report['plays'] += 1
+        self.report['animations'] += len(scene.animations)
+        self.num_plays += 1
+        self.record(scene)
+
+    def record(self, scene):
+        family = scene.get_mobject_family_members()
+        report = self.report
+        report['peak_mobjects'] = max(report['peak_mobjects'], len(family))
+        report['peak_points'] = max(report['peak_points'], sum(len(mob.points) for mob in family))
+        for mob in scene.mobjects:
+            if id(mob) in self.off_frame_ids or not mob.family_members_with_points():
+                continue
+            left, bottom = mob.get_corner(DL)[:2]
+            right, top = mob.get_corner(UR)[:2]
+            if (left < -config.frame_x_radius or right > config.frame_x_radius
+                    or bottom < -config.frame_y_radius or top > config.frame_y_radius):
+                self.off_frame_ids.add(id(mob))
+                report['off_frame'].append({
+                    'play': self.num_plays,
+                    'mobject': mob.__class__.__name__,
+                    'box': [round(float(x), 3) for x in (left, bottom, right, top)],
+                })
+
+    def update_frame(self, *args, **kwargs):
+        pass
+
+    def get_frame(self):
+        return self.camera.pixel_array
+
+    def scene_finished(self, scene):
+        self.record(scene)
+
+def stand_in_image_path(image_file_name):
+    # Missing raster assets get a gray placeholder so scenes still run.
+    try:
+        return real_image_path(image_file_name)
+    except OSError:
+        path = Path(tempfile.gettempdir()) / "dryrun-missing.png"
+        if not path.exists():
+            Image.new("RGB", (28, 28), (128, 128, 128)).save(path)
+        return path
+
+real_image_path = images.get_full_raster_image_path
+images.get_full_raster_image_path = stand_in_image_path
+image_mobject.get_full_raster_image_path = stand_in_image_path
+
+def dry_run(scene_class):
+    renderer = DryRunRenderer()
+    start = time.perf_counter()
+    try:
+        scene_class(renderer=renderer).render()
+        report = renderer.report
+    except Exception:
+        report = renderer.report
+        report['error'] = traceback.format_exc(limit=-3)
+    report['wall_time'] = round(time.perf_counter() - start, 3)
+    report['duration'] = round(report['duration'], 3)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Run scenes without rendering')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-s', '--scenes', nargs='*', help='Only these scenes')
+    parser.add_argument('--json', help='Write report to this file')
+    args = parser.parse_args()
+
+    config.dry_run = True
+    config.disable_caching = True
+    config.progress_bar = 'none'
+    config.verbosity = 'WARNING'
+
+    reports = {}
+    for file in args.files:
+        module = get_module(Path(file))
+        for scene_class in get_scene_classes_from_module(module):
+            name = scene_class.__name__
+            if args.scenes and name not in args.scenes:
+                continue
+            report = reports[f'{file}:{name}'] = dry_run(scene_class)
+            status = 'ERROR' if 'error' in report else f"{len(report['off_frame'])} off frame"
+            print(f"{file}:{name:<20} {report['duration']:6.1f}s {report['animations']:4} anims "
+                  f"{report['peak_mobjects']:6} mobs {report['peak_points']:8} points "
+                  f"{report['wall_time']:6.2f}s wall  {status}")
+            if 'error' in report:
+                print(report['error'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from manim import *
+from keyed import KeyedTransform
 
 # CreateCircle
 ## First example showing creating a simple animation
@@ -215,6 +216,8 @@ class LinkedListRemove2(Scene):
 ## Returns group of binary tree
 def bt(value, left=None, right=None):
     root = VGroup(Circle(0.75), Text(f'{value}'))
+    # Keys let KeyedTransform match nodes and edges between trees
+    root.key = value
     l = left if left is not None else Circle(0.25, stroke_opacity=0)
     r = right if right is not None else Circle(0.25, stroke_opacity=0)
     # Group left and right next to each other, top aligned
@@ -223,10 +226,11 @@ def bt(value, left=None, right=None):
     children = VGroup(l, r)
     children.next_to(root, DOWN, buff=0.5)
     tree = VGroup(root, children)
-    if left is not None:
-        tree.add(Arrow(start=root.get_bottom(), end=l.get_top(), buff=0, stroke_width=3.0))
-    if right is not None:
-        tree.add(Arrow(start=root.get_bottom(), end=r.get_top(), buff=0, stroke_width=3.0))
+    for child in (left, right):
+        if child is not None:
+            arrow = Arrow(start=root.get_bottom(), end=child.get_top(), buff=0, stroke_width=3.0)
+            arrow.key = (value, child[0].key)
+            tree.add(arrow)
     return tree
 
 class BinaryTree1(Scene):
@@ -280,7 +284,7 @@ class BinaryTree2(Scene):
         tree2.center()
         self.play(Create(tree1))
         self.wait()
-        self.play(FadeTransform(tree1, tree2))
+        self.play(KeyedTransform(tree1, tree2))
         self.wait()
 
 # Let's show an insert path
@@ -305,7 +309,7 @@ class BinaryTree3(Scene):
         tree2 = bt(10, bt(7, bt(5, None, bt(6)), bt(8)), bt(11))
         tree2.center().scale(0.7)
         self.remove(node)
-        self.play(Transform(tree1, tree2))
+        self.play(KeyedTransform(tree1, tree2))
         self.wait()
 
 ### GRU
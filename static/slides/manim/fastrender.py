@@ -0,0 +1,262 @@
+from manim import *
+from manim.constants import QUALITIES
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim.utils.family import extract_mobject_family_members
+from manim.utils.file_ops import write_to_movie
+from manim.utils.iterables import list_update
+from manim.utils.module_ops import get_module, get_scene_classes_from_module
+from pathlib import Path
+from queue import Empty, Queue
+import numpy as np
+import argparse
+import av
+import os
+
+from draft import draft_camera_class
+from lod import lod_camera_class
+from memstats import MemoryStats
+
+# Drop-in replacement for Scene that renders the same video faster.
+#
+#   class MyScene(FastScene):
+#       def construct(self):
+#           ...
+#
+# Scenes written against manim's Scene render with it from the command line,
+# without changing them:
+#
+#   python fastrender.py deep.py SGD GRUBoxScene -ql
+
+# Frames in flight between the renderer and the encoder thread
+RING_FRAMES = 4
+
+def plane_array(av_frame):
+    """Writable (height, width, 4) view of an RGBA frame's pixel buffer."""
+    plane = av_frame.planes[0]
+    rows = np.frombuffer(plane, dtype=np.uint8).reshape(plane.height, plane.line_size)
+    view = rows[:, :plane.width * 4].view()
+    # Rows may be padded, assigning the shape fails instead of copying
+    view.shape = (plane.height, plane.width, 4)
+    return view
+
+class HeldFrameFileWriter(SceneFileWriter):
+    # write_frame() copies the pixels straight into one of a few reusable
+    # encoder frames and returns, the writer thread converts and encodes it
+    # while the next frame is rasterized. No per frame allocation, and the
+    # renderer waits for a free frame instead of queueing up copies when
+    # encoding is the slower half.
+    ring_size = RING_FRAMES
+
+    def open_partial_movie_stream(self, file_path=None):
+        if getattr(self, "ring", None) is None:
+            self.ring = [av.VideoFrame(config.pixel_width, config.pixel_height, "rgba")
+                         for _ in range(self.ring_size)]
+            self.ring_arrays = [plane_array(f) for f in self.ring]
+        self.free = Queue()
+        for slot in range(self.ring_size):
+            self.free.put(slot)
+        super().open_partial_movie_stream(file_path)
+
+    def write_frame(self, frame_or_renderer, num_frames=1):
+        if not write_to_movie():
+            return super().write_frame(frame_or_renderer, num_frames)
+        slot = self.free_slot()
+        np.copyto(self.ring_arrays[slot], frame_or_renderer)
+        self.queue.put((num_frames, slot))
+
+    def free_slot(self):
+        while True:
+            try:
+                return self.free.get(timeout=1)
+            except Empty:
+                if not self.writer_thread.is_alive():
+                    raise RuntimeError("Video writer thread stopped") from None
+
+    def listen_and_write(self):
+        while True:
+            num_frames, slot = self.queue.get()
+            if slot is None:
+                break
+            try:
+                self.encode_and_write_frame(self.ring[slot], num_frames)
+            finally:
+                # The encoder reformats to its own pixel format and never
+                # keeps a reference to the RGBA frame
+                self.free.put(slot)
+
+    def encode_and_write_frame(self, av_frame, num_frames):
+        if num_frames == 1:
+            for packet in self.video_stream.encode(av_frame):
+                self.video_container.mux(packet)
+            return
+        # Held frame (static wait): do the RGBA -> stream colorspace conversion
+        # once and only copy the converted planes into each repeated frame.
+        pix_fmt = self.video_stream.pix_fmt
+        try:
+            planes = av_frame.reformat(format=pix_fmt).to_ndarray()
+        except ValueError:
+            # Pixel format has no ndarray round trip (e.g. yuva420p webm)
+            for _ in range(num_frames):
+                for packet in self.video_stream.encode(av_frame):
+                    self.video_container.mux(packet)
+            return
+        for _ in range(num_frames):
+            av_frame = av.VideoFrame.from_ndarray(planes, format=pix_fmt)
+            for packet in self.video_stream.encode(av_frame):
+                self.video_container.mux(packet)
+
+class FastRenderer(CairoRenderer):
+    def __init__(self, file_writer_class=HeldFrameFileWriter, **kwargs):
+        super().__init__(file_writer_class=file_writer_class, **kwargs)
+        # (box, premultiplied RGBA pixels) of static mobjects drawn above
+        # the moving ones, composited on top of every frame
+        self.overlay = None
+        memstats_dir = os.environ.get("FASTRENDER_MEMSTATS")
+        self.memstats = MemoryStats(memstats_dir) if memstats_dir else None
+
+    def play(self, scene, *args, **kwargs):
+        super().play(scene, *args, **kwargs)
+        if self.memstats is not None:
+            self.memstats.record(scene)
+
+    def scene_finished(self, scene):
+        super().scene_finished(scene)
+        if self.memstats is not None:
+            logger.info("Memory stats written to %s", self.memstats.finish(scene))
+
+    def add_frame(self, frame, num_frames=1):
+        if hasattr(self.camera, "draft_frame") and not self.skip_animations:
+            frame = self.camera.draft_frame(frame)
+        super().add_frame(frame, num_frames)
+
+    def set_lod_roots(self, scene):
+        # Level of detail is decided per top-level mobject, see lod.py
+        if hasattr(self.camera, "lod_roots"):
+            self.camera.lod_roots = list_update(scene.mobjects, scene.foreground_mobjects)
+
+    def update_frame(self, scene, *args, **kwargs):
+        self.set_lod_roots(scene)
+        super().update_frame(scene, *args, **kwargs)
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        self.overlay = None
+        # A frozen frame is rasterized exactly once by play(), there is no
+        # point in also painting everything into a background first.
+        if scene.is_current_animation_frozen_frame():
+            self.static_image = None
+            return None
+        overlay_mobjects = getattr(scene, "overlay_mobjects", [])
+        if overlay_mobjects and not self.skip_animations:
+            self.set_lod_roots(scene)
+            self.save_overlay(overlay_mobjects)
+        return super().save_static_frame_data(scene, static_mobjects)
+
+    def save_overlay(self, mobjects):
+        pixels = self.camera.pixel_array
+        self.camera.set_frame_to_background(np.zeros_like(pixels))
+        self.camera.capture_mobjects(mobjects)
+        alpha = pixels[:, :, 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if len(rows) == 0:
+            return
+        box = np.s_[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        self.overlay = (box, pixels[box].copy())
+
+    def render(self, scene, time, moving_mobjects):
+        self.update_frame(scene, moving_mobjects)
+        if self.overlay is not None:
+            # Premultiplied "over" of the cached top layer
+            box, layer = self.overlay
+            under = self.camera.pixel_array[box]
+            keep = 255 - layer[:, :, 3:].astype(np.uint16)
+            under[:] = layer + (under * keep + 127) // 255
+        # The file writer copies the pixels before returning, no need for
+        # get_frame()'s copy
+        self.add_frame(self.camera.pixel_array)
+
+def draw_order(mobjects, use_z_index):
+    """Top-level mobjects in the order the camera draws their families.
+
+    None when z-indices interleave the families of different mobjects.
+    """
+    if not use_z_index:
+        return list(mobjects)
+    keys = []
+    for mob in mobjects:
+        values = {m.z_index for m in mob.family_members_with_points()}
+        if len(values) > 1:
+            return None
+        keys.append(values.pop() if values else mob.z_index)
+    # Stable like the camera's sort
+    return [mobjects[i] for i in sorted(range(len(mobjects)), key=keys.__getitem__)]
+
+class FastScene(Scene):
+    def __init__(self, renderer=None, camera_class=Camera, skip_animations=False, **kwargs):
+        # FASTRENDER_LOD=n draws mobjects smaller than n pixels simplified, see lod.py
+        lod = float(os.environ.get("FASTRENDER_LOD", 0))
+        if lod:
+            camera_class = lod_camera_class(camera_class, lod)
+        # FASTRENDER_DRAFT=n rasterizes with draft.py at 1/n resolution
+        draft = int(os.environ.get("FASTRENDER_DRAFT", 0))
+        if draft:
+            camera_class = draft_camera_class(camera_class, draft, (config.pixel_height, config.pixel_width))
+        if renderer is None and config.renderer == RendererType.CAIRO:
+            renderer = FastRenderer(camera_class=camera_class, skip_animations=skip_animations)
+        super().__init__(renderer=renderer, camera_class=camera_class, skip_animations=skip_animations, **kwargs)
+        self.overlay_mobjects = []
+
+    def get_moving_and_static_mobjects(self, animations):
+        # Scene treats everything drawn after the first moving mobject as
+        # moving. Instead split the draw order (z-index respected) into a
+        # static layer below, the span that moves, and a static layer on top,
+        # so per frame cost only depends on what is between moving mobjects.
+        # The layers hold top-level mobjects, not their leaves, so the camera
+        # reads the families again on every frame and submobjects added or
+        # removed during play() are drawn as they are.
+        camera = self.renderer.camera
+        mobjects = list_update(self.mobjects, self.foreground_mobjects)
+        ordered = draw_order(mobjects, camera.use_z_index)
+        roots = [anim.mobject for anim in animations] + self.foreground_mobjects
+        roots += [mob for mob in self.get_mobject_family_members() if mob.updaters]
+        moving = set(id(mob) for mob in extract_mobject_family_members(roots))
+        self.overlay_mobjects = []
+        if ordered is None:
+            # Layers can not be told apart, draw all of it every frame
+            return mobjects, []
+        if hasattr(camera, "get_mobjects_indicating_movement"):
+            # Moving camera frame: every mobject moves on screen
+            if any(id(mob) in moving for mob in camera.get_mobjects_indicating_movement()):
+                return ordered, []
+        indices = [i for i, mob in enumerate(ordered) if any(id(m) in moving for m in mob.get_family())]
+        if not indices:
+            return [], ordered
+        first, last = indices[0], indices[-1] + 1
+        self.overlay_mobjects = ordered[last:]
+        return ordered[first:last], ordered[:first]
+
+def fast_scene_class(scene_class):
+    """scene_class rendered by FastScene, for scenes written against Scene."""
+    if issubclass(scene_class, FastScene):
+        return scene_class
+    # Before FastScene so its __init__ (camera_class=...) goes through
+    return type(scene_class.__name__, (scene_class, FastScene), {'__module__': scene_class.__module__})
+
+def main():
+    flags = {q['flag']: name for name, q in QUALITIES.items() if q['flag']}
+    parser = argparse.ArgumentParser(description='Render scenes with FastScene')
+    parser.add_argument('file')
+    parser.add_argument('scenes', nargs='*', help='Default is all scenes in file')
+    parser.add_argument('-q', '--quality', choices=list(flags), default='h')
+    args = parser.parse_args()
+
+    config.input_file = str(Path(args.file).resolve())
+    config.quality = flags[args.quality]
+    for scene_class in get_scene_classes_from_module(get_module(Path(args.file))):
+        if args.scenes and scene_class.__name__ not in args.scenes:
+            continue
+        fast_scene_class(scene_class)().render()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+from manim import *
+import numpy as np
+
+# Transform between two versions of a data structure by matching parts.
+#
+#   tree1 = bt(7, bt(5), bt(10, bt(8), bt(11)))
+#   tree2 = bt(10, bt(7, bt(5), bt(8)), bt(11))
+#   self.play(KeyedTransform(tree1, tree2))
+#
+# Submobjects with a key (by default a `key` attribute, e.g. the node value)
+# are matched between the two. Matched parts glide from where they were to
+# where they end up, parts only in the target fade in, parts only in the
+# source fade out. Unkeyed leaves are matched by where they sit below the
+# nearest group with a keyed submobject (bt()'s empty child placeholders
+# below node 5 are matched with those below node 5), and leaves that draw
+# nothing are left out. Unlike Transform nothing is aligned or resampled,
+# and parts that did not move cost nothing per frame. Like
+# ReplacementTransform, the target is in the scene afterwards.
+
+def attribute_key(mob):
+    return getattr(mob, 'key', None)
+
+def invisible(mob):
+    """Whether a VMobject draws nothing, no fill and no stroke."""
+    if not isinstance(mob, VMobject):
+        return False
+    return (not mob.fill_rgbas[:, 3].any()
+            and (not mob.stroke_rgbas[:, 3].any() or mob.stroke_width == 0)
+            and (not mob.background_stroke_rgbas[:, 3].any() or mob.background_stroke_width == 0))
+
+def keyed_parts(mob, key):
+    """Outermost keyed submobjects by key, and visible unkeyed leaves with
+    points by (key of the nearest group's first keyed submobject, path)."""
+    parts, loose = {}, {}
+    stack = [(mob, None, ())]
+    while stack:
+        m, owner, path = stack.pop()
+        k = key(m)
+        if k is not None and k not in parts:
+            parts[k] = m
+        elif m.submobjects:
+            first = next((c for c in map(key, m.submobjects) if c is not None), None)
+            if first is not None:
+                owner, path = first, ()
+            stack.extend((sub, owner, path + (i,)) for i, sub in reversed(list(enumerate(m.submobjects))))
+        elif len(m.points) and not invisible(m):
+            name = (owner, path)
+            # Repeated keys make names ambiguous, those leaves just fade
+            loose[name if name not in loose else ('unmatched', id(m))] = m
+    return parts, loose
+
+class Fade:
+    """Scales the opacity of a mobject family, restorable."""
+    ATTRS = ['fill_rgbas', 'stroke_rgbas', 'background_stroke_rgbas']
+
+    def __init__(self, mob):
+        self.saved = [(m, a, getattr(m, a).copy()) for m in mob.get_family() for a in self.ATTRS
+                      if isinstance(getattr(m, a, None), np.ndarray)]
+
+    def set(self, opacity):
+        for m, a, rgbas in self.saved:
+            faded = rgbas.copy()
+            faded[:, 3] *= opacity
+            setattr(m, a, faded)
+
+    def restore(self):
+        for m, a, rgbas in self.saved:
+            setattr(m, a, rgbas)
+
+class KeyedTransform(Animation):
+    def __init__(self, mobject, target_mobject, key=attribute_key, **kwargs):
+        self.source = mobject
+        self.target = target_mobject
+        source_parts, source_loose = keyed_parts(mobject, key)
+        target_parts, target_loose = keyed_parts(target_mobject, key)
+
+        # (mobject, start points, end points) for every moving point array
+        self.moves = []
+        for k in source_parts.keys() & target_parts.keys():
+            self.add_move(source_parts[k], target_parts[k])
+        for k in source_loose.keys() & target_loose.keys():
+            self.add_move(source_loose[k], target_loose[k])
+        removed = [source_parts[k] for k in source_parts.keys() - target_parts.keys()]
+        removed += [source_loose[k] for k in source_loose.keys() - target_loose.keys()]
+        added = [target_parts[k] for k in target_parts.keys() - source_parts.keys()]
+        added += [target_loose[k] for k in target_loose.keys() - source_loose.keys()]
+        self.fade_out = [Fade(m) for m in removed]
+        self.fade_in = [Fade(m) for m in added]
+        super().__init__(Group(target_mobject, *removed), **kwargs)
+
+    def add_move(self, start, end):
+        start_family = start.family_members_with_points()
+        end_family = end.family_members_with_points()
+        same_shape = len(start_family) == len(end_family) and all(
+            s.points.shape == e.points.shape for s, e in zip(start_family, end_family))
+        offset = start.get_center() - end.get_center()
+        for i, e in enumerate(end_family):
+            # Same structure: morph point by point, otherwise slide into place
+            begin = start_family[i].points.copy() if same_shape else e.points + offset
+            if not np.array_equal(begin, e.points):
+                self.moves.append((e, begin, e.points.copy()))
+
+    def create_starting_mobject(self):
+        # Starts are kept per moving part, no need to copy everything
+        return Mobject()
+
+    def _setup_scene(self, scene):
+        if scene is not None:
+            scene.remove(self.source)
+        super()._setup_scene(scene)
+
+    def interpolate_mobject(self, alpha):
+        t = self.rate_func(alpha)
+        for mob, begin, end in self.moves:
+            mob.points = begin + (end - begin) * t
+        for fade in self.fade_in:
+            fade.set(t)
+        for fade in self.fade_out:
+            fade.set(1 - t)
+
+    def clean_up_from_scene(self, scene):
+        super().clean_up_from_scene(scene)
+        scene.remove(self.mobject)
+        for fade in self.fade_out:
+            fade.restore()
+        scene.add(self.target)
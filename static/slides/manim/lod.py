@@ -0,0 +1,145 @@
+from manim import *
+from manim.utils.family import extract_mobject_family_members
+import numpy as np
+import weakref
+
+# Level of detail: draw something cheaper for mobjects that are only a few
+# pixels big on screen.
+#
+#   text   -> filled bar over where the glyphs are
+#   group  -> filled bounding rectangle
+#   curve  -> polygon through its anchors
+#
+# A mobject picks its own stand in with a `lod` attribute, a function
+# (mobject, proxy, box) that points and styles the VMobject proxy for the
+# bounding box [[x0, y0], [x1, y1]], or None to always draw it in full.
+# FastScene turns this on with FASTRENDER_LOD=n for mobjects below n pixels
+# (off by default, 6 is a good start). Stand-ins are picked for the scene's
+# top-level mobjects, so a mobject looks the same whether the camera is
+# given it or one of its groups, in play() frames and in frozen waits.
+
+LOD_PIXELS = 6
+# Fraction of a line of text covered by ink
+TEXT_COVERAGE = 0.5
+
+TEXT_CLASSES = (Text, MarkupText, SingleStringMathTex, Paragraph)
+
+def box_corners(box):
+    (x0, y0), (x1, y1) = box
+    return [[x0, y0, 0], [x1, y0, 0], [x1, y1, 0], [x0, y1, 0], [x0, y0, 0]]
+
+def first_color(mob):
+    for m in mob.family_members_with_points():
+        if m.get_fill_opacity() > 0:
+            return m.get_fill_color(), m.get_fill_opacity()
+        if m.get_stroke_opacity() > 0 and m.get_stroke_width() > 0:
+            return m.get_stroke_color(), m.get_stroke_opacity()
+    return BLACK, 0
+
+def text_bar(mob, proxy, box):
+    color, opacity = first_color(mob)
+    proxy.set_points_as_corners(box_corners(box))
+    proxy.set_fill(color, opacity * TEXT_COVERAGE).set_stroke(width=0)
+
+def bounding_rectangle(mob, proxy, box):
+    color, opacity = first_color(mob)
+    proxy.set_points_as_corners(box_corners(box))
+    proxy.set_fill(color, opacity).set_stroke(width=0)
+
+def polyline(mob, proxy, box):
+    proxy.clear_points()
+    for subpath in mob.get_subpaths():
+        proxy.start_new_path(subpath[0])
+        proxy.add_points_as_corners(subpath[3::4])
+    proxy.match_style(mob, family=False)
+
+def default_lod(mob):
+    if isinstance(mob, TEXT_CLASSES):
+        return text_bar
+    if mob.submobjects:
+        return bounding_rectangle
+    return polyline
+
+def leaf_boxes(leaves):
+    """(n, 2, 2) bounding boxes of mobjects with points, in one pass."""
+    points = np.concatenate([leaf.points[:, :2] for leaf in leaves])
+    starts = np.cumsum([0] + [len(leaf.points) for leaf in leaves[:-1]])
+    return np.stack([np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)], axis=1)
+
+class LodCameraMixin:
+    lod_pixels = LOD_PIXELS
+    # Top-level mobjects of the scene, set by FastRenderer before drawing
+    lod_roots = None
+
+    def get_mobjects_to_display(self, mobjects, include_submobjects=True, excluded_mobjects=None):
+        displayed = super().get_mobjects_to_display(mobjects, include_submobjects, excluded_mobjects)
+        if not include_submobjects or not displayed:
+            return displayed
+        if not hasattr(self, 'lod_proxies'):
+            self.lod_proxies = weakref.WeakKeyDictionary()
+        scale = self.pixel_width / self.frame_width
+        # Leaf with points -> what to draw instead (None to skip)
+        substitutes = {}
+        for root in self.roots_of(mobjects):
+            leaves = root.family_members_with_points()
+            if not leaves:
+                continue
+            boxes = leaf_boxes(leaves)
+            # A group is at least as big as any of its members, if no leaf
+            # is small nothing in this family is. Text is measured by height.
+            sizes = boxes[:, 1] - boxes[:, 0]
+            if any(getattr(m, 'lod', default_lod(m)) is text_bar for m in root.get_family()):
+                sizes = sizes[:, 1]
+            else:
+                sizes = sizes.max(axis=1)
+            if sizes.min() * scale >= self.lod_pixels:
+                continue
+            index = {id(leaf): i for i, leaf in enumerate(leaves)}
+            self.choose(root, scale, boxes, index, substitutes)
+        if not substitutes:
+            return displayed
+        return [substitutes.get(id(m), m) for m in displayed if substitutes.get(id(m), m) is not None]
+
+    def roots_of(self, mobjects):
+        """Scene top-level mobjects whose families hold mobjects."""
+        if self.lod_roots is None:
+            return mobjects
+        roots = {id(root) for root in self.lod_roots}
+        if all(id(mob) in roots for mob in mobjects):
+            return mobjects
+        # Given members of families, the leaves Scene passes during play()
+        wanted = {id(m) for m in extract_mobject_family_members(mobjects)}
+        found = [root for root in self.lod_roots if any(id(m) in wanted for m in root.get_family())]
+        covered = {id(m) for m in extract_mobject_family_members(found)}
+        return found + [mob for mob in mobjects if id(mob) not in covered]
+
+    def choose(self, mob, scale, boxes, index, substitutes):
+        # Outermost small enough mobject wins, its family is not visited
+        leaves = mob.family_members_with_points()
+        if not leaves:
+            return
+        lod = getattr(mob, 'lod', default_lod(mob))
+        if lod is None:
+            return
+        if all(isinstance(m, VMobject) for m in mob.get_family()):
+            members = boxes[[index[id(leaf)] for leaf in leaves]]
+            box = np.array([members[:, 0].min(axis=0), members[:, 1].max(axis=0)])
+            width, height = (box[1] - box[0]) * scale
+            size = height if lod is text_bar else max(width, height)
+            if size < self.lod_pixels:
+                proxy = self.lod_proxies.get(mob)
+                if proxy is None:
+                    proxy = self.lod_proxies[mob] = VMobject()
+                lod(mob, proxy, box)
+                proxy.z_index = mob.z_index
+                for leaf in leaves:
+                    substitutes[id(leaf)] = None
+                substitutes[id(leaves[0])] = proxy
+                return
+        for sub in mob.submobjects:
+            self.choose(sub, scale, boxes, index, substitutes)
+
+def lod_camera_class(camera_class, pixels):
+    return type(f"Lod{camera_class.__name__}", (LodCameraMixin, camera_class), {
+        'lod_pixels': pixels,
+    })
@@ -0,0 +1,58 @@
+from pathlib import Path
+import json
+import tracemalloc
+import numpy as np
+
+# Memory accounting for a render, enabled for FastScene with
+#
+#   FASTRENDER_MEMSTATS=memstats python fastrender.py deep.py SGD -ql
+#
+# which writes memstats/SGD.json with live mobjects and array bytes grouped by
+# class at every play(), plus tracemalloc peak memory for the whole render.
+
+def mobject_memory(scene):
+    by_class = {}
+    for mob in scene.get_mobject_family_members():
+        entry = by_class.setdefault(type(mob).__name__, {
+            'count': 0, 'points': 0, 'points_bytes': 0, 'other_array_bytes': 0,
+        })
+        entry['count'] += 1
+        entry['points'] += len(mob.points)
+        entry['points_bytes'] += mob.points.nbytes
+        entry['other_array_bytes'] += sum(
+            v.nbytes for k, v in mob.__dict__.items()
+            if isinstance(v, np.ndarray) and k != 'points')
+    return dict(sorted(by_class.items(), key=lambda kv: -kv[1]['points_bytes']))
+
+class MemoryStats:
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.plays = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    def record(self, scene):
+        by_class = mobject_memory(scene)
+        current, _ = tracemalloc.get_traced_memory()
+        self.plays.append({
+            'play': len(self.plays),
+            'time': round(scene.time, 3),
+            'mobjects': sum(e['count'] for e in by_class.values()),
+            'points_bytes': sum(e['points_bytes'] for e in by_class.values()),
+            'traced_bytes': current,
+            'by_class': by_class,
+        })
+
+    def finish(self, scene):
+        current, peak = tracemalloc.get_traced_memory()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"{type(scene).__name__}.json"
+        with open(path, 'w') as f:
+            json.dump({
+                'scene': type(scene).__name__,
+                'peak_traced_bytes': peak,
+                'final_traced_bytes': current,
+                'plays': self.plays,
+            }, f, indent=2)
+        return path
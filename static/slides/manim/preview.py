@@ -0,0 +1,352 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from watch import Graph, snapshot
+
+# Preview scenes in the browser while they render.
+#
+#   python preview.py -j 4          # then open http://localhost:8000
+#
+# Lists the scenes of examples.py and deep.py. Opening one renders it at
+# preview quality as a PNG sequence in a pool of -j workers, and every frame
+# is sent over a WebSocket as soon as manim has written it, so the scene
+# starts playing long before the render is done. Renders are kept in
+# media/preview by the hash of the scene and everything it depends on (see
+# watch.py): reopening an unchanged scene replays it from disk, editing it
+# renders it again. Any number of pages can watch the same render.
+#
+# A wait is rendered once, so it is one PNG named with how many frames it
+# lasts (<number>_<frames>.png). The page holds it that long, and scenes
+# play at their real speed.
+
+HERE = Path(__file__).resolve().parent
+SOURCES = [HERE / 'examples.py', HERE / 'deep.py']
+FRAME_RATES = {'l': 15, 'm': 30, 'h': 60, 'p': 60, 'k': 60}
+QUALITY_NAMES = {'l': 'low_quality', 'm': 'medium_quality', 'h': 'high_quality',
+                 'p': 'production_quality', 'k': 'fourk_quality'}
+# Part of the cache directory names, renders of an older layout are not reused
+CACHE_VERSION = 2
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+POLL_SECONDS = 0.05
+
+PAGE = '''<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Scene preview</title>
+<style>
+body { background: #111; color: #ddd; font-family: sans-serif; display: flex; margin: 0; }
+nav { width: 16em; height: 100vh; overflow-y: auto; padding: 0.5em; }
+nav a { display: block; color: #8cf; text-decoration: none; padding: 0.1em 0; }
+nav a.cached::after { content: " \\2713"; color: #6c6; }
+nav small { color: #888; }
+main { flex: 1; padding: 1em; }
+img { max-width: 100%; background: #000; }
+</style>
+</head>
+<body>
+<nav id="scenes"></nav>
+<main><h3 id="title">Pick a scene</h3><img id="frame"><p id="status"></p></main>
+<script>
+let socket = null;
+let timer = null;
+const frames = [];
+
+async function list() {
+  const scenes = await (await fetch('/scenes')).json();
+  const nav = document.getElementById('scenes');
+  nav.innerHTML = '';
+  let file = null;
+  for (const scene of scenes) {
+    if (scene.file !== file) {
+      file = scene.file;
+      nav.insertAdjacentHTML('beforeend', `<small>${file}</small>`);
+    }
+    const a = document.createElement('a');
+    a.href = '#' + scene.name;
+    a.textContent = scene.name;
+    a.className = scene.cached ? 'cached' : '';
+    nav.append(a);
+  }
+}
+
+function play(name) {
+  if (socket) socket.close();
+  clearInterval(timer);
+  frames.length = 0;
+  let shown = 0, held = 0, received = 0, status = 'connecting';
+  const img = document.getElementById('frame');
+  const report = () => document.getElementById('status').textContent = `${status}, ${received} frames`;
+  document.getElementById('title').textContent = name;
+  socket = new WebSocket(`ws://${location.host}/frames/${name}`);
+  socket.binaryType = 'arraybuffer';
+  socket.onmessage = (event) => {
+    if (typeof event.data === 'string') {
+      const message = JSON.parse(event.data);
+      status = message.status + (message.error ? ': ' + message.error : '');
+      if (message.fps) {
+        clearInterval(timer);
+        // Frames play at the scene's rate, each for as many frames as it is
+        // held, or wait for the render to catch up
+        timer = setInterval(() => {
+          if (held > 1) {
+            held--;
+          } else if (shown < frames.length) {
+            URL.revokeObjectURL(img.src);
+            img.src = URL.createObjectURL(frames[shown].image);
+            held = frames[shown].hold;
+            frames[shown++] = null;
+          }
+        }, 1000 / message.fps);
+      }
+      if (message.status === 'done') list();
+    } else {
+      // Frames held, then the PNG
+      const hold = new DataView(event.data).getUint32(0);
+      frames.push({ hold, image: new Blob([event.data.slice(4)], { type: 'image/png' }) });
+      received++;
+    }
+    report();
+  };
+}
+
+window.onhashchange = () => play(location.hash.slice(1));
+list().then(() => { if (location.hash) play(location.hash.slice(1)); });
+</script>
+</body>
+</html>
+'''
+
+def scene_key(graph, scene):
+    hashes = graph.hashes()
+    return hashlib.sha1(''.join(
+        f'{p}:{n}:{hashes[p, n]}' for p, n in sorted(graph.dependencies(scene))).encode()).hexdigest()[:16]
+
+def frame_number(path):
+    return int(re.fullmatch(r'(\d+)_(\d+)\.png', path.name).group(1))
+
+def frame_hold(path):
+    return int(re.fullmatch(r'(\d+)_(\d+)\.png', path.name).group(2))
+
+def render_frames(file, name, quality, out):
+    """Render a scene into out as <number>_<frames held>.png."""
+    # Only the render processes need manim, the server does not
+    from manim import config
+    from manim.scene.scene_file_writer import SceneFileWriter
+    from manim.utils.module_ops import get_module, get_scene_classes_from_module
+    from PIL import Image
+
+    class FrameWriter(SceneFileWriter):
+        count = 0
+
+        def write_frame(self, frame, num_frames=1):
+            # Written under another name and renamed, a listed frame is complete
+            tmp = out / f'.{self.count:06d}.png'
+            Image.fromarray(frame).save(tmp, format='PNG')
+            tmp.replace(out / f'{self.count:06d}_{num_frames}.png')
+            self.count += 1
+
+    config.input_file = str(Path(file).resolve())
+    config.media_dir = str(out.parent / 'media')
+    config.quality = QUALITY_NAMES[quality]
+    config.write_to_movie = False
+    config.save_last_frame = False
+    config.disable_caching = True
+    config.progress_bar = 'none'
+    out.mkdir(parents=True, exist_ok=True)
+    scene_class = next(c for c in get_scene_classes_from_module(get_module(Path(file))) if c.__name__ == name)
+    scene = scene_class()
+    scene.renderer.file_writer = FrameWriter(scene.renderer, name)
+    scene.render()
+
+class Render:
+    """One scene rendered as PNG frames into directory, shared by viewers."""
+
+    def __init__(self, scene, directory):
+        self.file, self.name = scene
+        self.directory = directory
+        self.images = directory / 'frames'
+        self.finished = threading.Event()
+        self.error = None
+        if (directory / 'done.json').exists():
+            self.finished.set()
+
+    def run(self, quality):
+        command = [sys.executable, str(Path(__file__).resolve()), '--render', self.file.name, self.name,
+                   '-q', quality, '--cache', str(self.images)]
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(command, cwd=self.file.parent, capture_output=True, text=True)
+            (self.directory / 'render.log').write_text(result.stdout + result.stderr)
+            if result.returncode != 0:
+                self.error = f"render exited with {result.returncode}: {result.stderr.strip()[-500:]}"
+        except OSError as e:
+            self.error = str(e)
+        if self.error is None:
+            # Only successful renders are cached, failures are tried again
+            (self.directory / 'done.json').write_text(json.dumps({'seconds': time.perf_counter() - start}))
+        print(f"{self.name}: {'failed' if self.error else 'rendered'} in {time.perf_counter() - start:.1f}s",
+              flush=True)
+        self.finished.set()
+
+    def frames(self):
+        """Paths of the frames in order, as they appear."""
+        sent = 0
+        while True:
+            finished = self.finished.is_set()
+            paths = sorted(self.images.glob('[0-9]*.png'), key=frame_number) if self.images.exists() else []
+            yield from paths[sent:]
+            sent = max(sent, len(paths))
+            if finished:
+                return
+            self.finished.wait(POLL_SECONDS)
+
+class Previews:
+    def __init__(self, sources, jobs, quality, cache_dir):
+        self.sources = sources
+        self.quality = quality
+        self.cache_dir = Path(cache_dir)
+        self.pool = ThreadPoolExecutor(jobs)
+        self.renders = {}
+        self.lock = threading.Lock()
+        self.graph = None
+        self.mtimes = None
+
+    def scenes(self):
+        # Parsed again when a file changed, so edits show up
+        with self.lock:
+            if self.graph is None or snapshot(self.mtimes) != self.mtimes:
+                self.graph = Graph(self.sources)
+                self.mtimes = snapshot(self.graph.modules)
+            graph = self.graph
+        return graph, {scene[1]: scene for scene in graph.scenes}
+
+    def directory(self, graph, scene):
+        return self.cache_dir / f'{scene[1]}-{scene_key(graph, scene)}-{self.quality}-v{CACHE_VERSION}'
+
+    def listing(self):
+        graph, scenes = self.scenes()
+        return [{
+            'name': name,
+            'file': scene[0].name,
+            'cached': (self.directory(graph, scene) / 'done.json').exists(),
+        } for name, scene in scenes.items()]
+
+    def render(self, name):
+        """Render for a scene, started in the pool unless cached or running."""
+        graph, scenes = self.scenes()
+        scene = scenes.get(name)
+        if scene is None:
+            return None
+        directory = self.directory(graph, scene)
+        with self.lock:
+            render = self.renders.get(directory)
+            if render is None or render.error:
+                render = self.renders[directory] = Render(scene, directory)
+                if not render.finished.is_set():
+                    if directory.exists():
+                        # Left over from a server that was stopped mid render
+                        shutil.rmtree(directory)
+                    directory.mkdir(parents=True)
+                    self.pool.submit(render.run, self.quality)
+        return render
+
+def websocket_frame(opcode, payload):
+    """Unmasked single frame from the server, RFC 6455 section 5.2."""
+    head = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        head += bytes([len(payload)])
+    elif len(payload) < 1 << 16:
+        head += bytes([126]) + struct.pack('>H', len(payload))
+    else:
+        head += bytes([127]) + struct.pack('>Q', len(payload))
+    return head + payload
+
+class Handler(BaseHTTPRequestHandler):
+    previews = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/':
+            return self.send(PAGE.encode(), 'text/html; charset=utf-8')
+        if self.path == '/scenes':
+            return self.send(json.dumps(self.previews.listing()).encode(), 'application/json')
+        match = re.fullmatch(r'/frames/(\w+)', self.path)
+        if match and self.headers.get('Upgrade', '').lower() == 'websocket':
+            return self.stream(match.group(1))
+        self.send_error(404)
+
+    def stream(self, name):
+        key = self.headers['Sec-WebSocket-Key'] + WEBSOCKET_GUID
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', base64.b64encode(hashlib.sha1(key.encode()).digest()).decode())
+        self.end_headers()
+        self.close_connection = True
+
+        def message(**fields):
+            self.wfile.write(websocket_frame(0x1, json.dumps(fields).encode()))
+
+        try:
+            render = self.previews.render(name)
+            if render is None:
+                return message(status='error', error=f'no scene {name}')
+            cached = render.finished.is_set()
+            message(status='cached' if cached else 'rendering', fps=FRAME_RATES.get(self.previews.quality, 15))
+            for path in render.frames():
+                self.wfile.write(websocket_frame(0x2, struct.pack('>I', frame_hold(path)) + path.read_bytes()))
+            message(status='error' if render.error else 'done', error=render.error)
+            # Closing handshake, the reply is not waited for
+            self.wfile.write(websocket_frame(0x8, struct.pack('>H', 1000)))
+        except (BrokenPipeError, ConnectionResetError):
+            # Page closed or switched scenes, the render carries on
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description='Preview scenes in the browser while they render')
+    parser.add_argument('files', nargs='*', default=[str(p) for p in SOURCES])
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('-q', '--quality', default='l', choices=list(QUALITY_NAMES),
+                        help='manim quality letter, l for preview')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache', default=str(HERE / 'media' / 'preview'))
+    parser.add_argument('--render', nargs=2, metavar=('FILE', 'SCENE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.render:
+        # Render process started by Render.run(), --cache is its frame directory
+        return render_frames(*args.render, args.quality, Path(args.cache))
+
+    Handler.previews = Previews(args.files, args.jobs, args.quality, args.cache)
+    server = ThreadingHTTPServer(('localhost', args.port), Handler)
+    server.daemon_threads = True
+    print(f"previewing {len(Handler.previews.listing())} scenes at http://localhost:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import ast
+import hashlib
+import json
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Render queue for rebuilding the decks. Every (scene, quality, format,
+# output) is a row in an SQLite database, so an interrupted run picks up
+# where it stopped.
+#
+#   python renderqueue.py deck . ../cherry-lip-sync -q h
+#   python renderqueue.py add deep.py SGD -q l -f png --priority 5
+#   python renderqueue.py run -j 4
+#   python renderqueue.py status
+#   python renderqueue.py retry
+
+HERE = Path(__file__).resolve().parent
+SOURCES = [HERE / 'deep.py', HERE / 'examples.py']
+FORMATS = ['mp4', 'png', 'gif', 'webm', 'mov']
+QUALITIES = ['l', 'm', 'h', 'p', 'k']
+
+SCHEMA = '''
+create table if not exists jobs (
+    id integer primary key,
+    file text not null,
+    scene text not null,
+    quality text not null,
+    format text not null,
+    output text not null,
+    priority integer not null default 0,
+    status text not null default 'pending',
+    attempts integer not null default 0,
+    max_attempts integer not null default 3,
+    output_hash text,
+    error text,
+    queued_at real,
+    started_at real,
+    finished_at real,
+    unique (file, scene, quality, format, output)
+)
+'''
+
+def connect(path):
+    db = sqlite3.connect(path, timeout=60, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute('pragma journal_mode=wal')
+    db.execute(SCHEMA)
+    return db
+
+def add_job(db, file, scene, quality='h', format='mp4', output=None, priority=0, max_attempts=3):
+    """Queue a job, or requeue it if it already exists. Returns its id."""
+    file = str(Path(file).resolve())
+    if output is None:
+        output = HERE / 'gfx' / f'{scene}.{format}'
+    output = str(Path(output).resolve())
+    db.execute('''
+        insert into jobs (file, scene, quality, format, output, priority, max_attempts, queued_at)
+        values (?, ?, ?, ?, ?, ?, ?, ?)
+        on conflict (file, scene, quality, format, output) do update set
+            priority = excluded.priority, max_attempts = excluded.max_attempts,
+            status = 'pending', attempts = 0, error = null, queued_at = excluded.queued_at
+    ''', (file, scene, quality, format, output, priority, max_attempts, time.time()))
+    return db.execute('select id from jobs where file = ? and scene = ? and quality = ? and format = ? and output = ?',
+                      (file, scene, quality, format, output)).fetchone()[0]
+
+def scene_files(sources=SOURCES):
+    """Map scene class name -> source file, without importing manim."""
+    scenes = {}
+    for source in sources:
+        for node in ast.parse(source.read_text()).body:
+            if isinstance(node, ast.ClassDef) and node.bases:
+                scenes.setdefault(node.name, source)
+    return scenes
+
+def deck_jobs(deck):
+    """(file, scene, format, output) for every gfx/<Scene>.<format> in a deck."""
+    deck = Path(deck)
+    scenes = scene_files()
+    found = []
+    pattern = r'gfx/(\w+)\.(' + '|'.join(FORMATS) + r')\b'
+    for name, format in sorted(set(re.findall(pattern, (deck / 'index.html').read_text()))):
+        if name in scenes:
+            found.append((scenes[name], name, format, deck / 'gfx' / f'{name}.{format}'))
+    return found
+
+def claim(db):
+    # Atomic: only one worker can move a given job to running. The attempt
+    # is counted when it ends, an interrupted render is not an attempt.
+    db.execute('begin immediate')
+    try:
+        row = db.execute('''
+            select * from jobs where status = 'pending'
+            order by priority desc, id limit 1
+        ''').fetchone()
+        if row is not None:
+            db.execute('''update jobs set status = 'running', started_at = ?, finished_at = null
+                          where id = ?''', (time.time(), row['id']))
+        db.execute('commit')
+    except BaseException:
+        db.execute('rollback')
+        raise
+    return row
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def release(db, job):
+    db.execute("update jobs set status = 'pending', started_at = null where id = ?", (job['id'],))
+
+class Processes:
+    """Running manim processes, stopped together on Ctrl-C.
+
+    They run in their own session so Ctrl-C only reaches renderqueue, which
+    sets stopping before it terminates them: a worker that sees its render
+    fail can tell an interrupt from a broken scene.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = set()
+        self.stopping = False
+
+    def run(self, command, **kwargs):
+        with self.lock:
+            if self.stopping:
+                raise RuntimeError('stopping')
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       start_new_session=True, **kwargs)
+            self.running.add(process)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            with self.lock:
+                self.running.discard(process)
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def stop(self):
+        with self.lock:
+            self.stopping = True
+            for process in self.running:
+                process.terminate()
+
+def render(job, log, processes):
+    """Render one job into its output path, returns the output hash."""
+    with tempfile.TemporaryDirectory(prefix='renderqueue-') as media:
+        command = [sys.executable, '-m', 'manim', 'render', f"-q{job['quality']}", '--media_dir', media]
+        if job['format'] == 'png':
+            command += ['-s', '--format', 'png']
+        else:
+            command += ['--format', job['format']]
+        command += [job['file'], job['scene']]
+        result = processes.run(command, cwd=Path(job['file']).parent)
+        log.write(result.stdout + result.stderr)
+        if result.returncode != 0:
+            raise RuntimeError(f"manim exited with {result.returncode}: {result.stderr.strip()[-2000:]}")
+        # Partial movie files are in a subdirectory, the result is the newest
+        # file of the right type named after the scene
+        candidates = [p for p in Path(media).rglob(f"{job['scene']}*.{job['format']}")
+                      if 'partial_movie_files' not in p.parts]
+        if not candidates:
+            raise RuntimeError('manim did not produce an output file')
+        produced = max(candidates, key=lambda p: p.stat().st_mtime)
+        output = Path(job['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_name(f'.{output.name}.tmp')
+        shutil.copyfile(produced, tmp)
+        tmp.replace(output)
+        return file_hash(output)
+
+def worker(db_path, log_dir, processes):
+    db = connect(db_path)
+    while not processes.stopping:
+        job = claim(db)
+        if job is None:
+            return
+        if processes.stopping:
+            # Ctrl-C came while claiming
+            release(db, job)
+            return
+        label = f"{Path(job['file']).name}:{job['scene']} -q{job['quality']} {job['format']}"
+        print(f"start  {label} (attempt {job['attempts'] + 1})", flush=True)
+        start = time.time()
+        try:
+            with open(Path(log_dir) / f"{job['id']}.log", 'w') as log:
+                digest = render(job, log, processes)
+        except Exception as e:
+            if processes.stopping:
+                # Killed by Ctrl-C, not the job's fault
+                release(db, job)
+                return
+            attempts = job['attempts'] + 1
+            status = 'pending' if attempts < job['max_attempts'] else 'failed'
+            db.execute("update jobs set status = ?, attempts = ?, error = ?, finished_at = ? where id = ?",
+                       (status, attempts, str(e), time.time(), job['id']))
+            print(f"{status:<6} {label}: {e}", flush=True)
+        else:
+            db.execute('''update jobs set status = 'done', attempts = attempts + 1, output_hash = ?, error = null,
+                          finished_at = ? where id = ?''', (digest, time.time(), job['id']))
+            print(f"done   {label} in {time.time() - start:.1f}s {digest[:12]}", flush=True)
+
+def run(db_path, jobs):
+    db = connect(db_path)
+    # Jobs left running by an interrupted run go back to the queue
+    resumed = db.execute("update jobs set status = 'pending', started_at = null where status = 'running'").rowcount
+    if resumed:
+        print(f"resuming {resumed} interrupted jobs")
+    log_dir = Path(db_path).parent / 'renderqueue-logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    processes = Processes()
+    pool = ThreadPoolExecutor(jobs)
+    futures = [pool.submit(worker, db_path, log_dir, processes) for _ in range(jobs)]
+    try:
+        for future in futures:
+            future.result()
+    finally:
+        # No new jobs are claimed, workers put the ones being rendered back
+        processes.stop()
+        pool.shutdown()
+
+def status(db, as_json=False):
+    rows = [dict(row) for row in db.execute('select * from jobs order by priority desc, id')]
+    for row in rows:
+        ended = row['finished_at'] if row['status'] != 'running' else time.time()
+        row['seconds'] = round(ended - row['started_at'], 2) if row['started_at'] and ended else None
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        seconds = f"{row['seconds']:8.1f}s" if row['seconds'] is not None else ' ' * 9
+        print(f"{row['id']:4} {row['status']:<8} {row['priority']:3} {row['attempts']}/{row['max_attempts']} "
+              f"{seconds} {Path(row['file']).name}:{row['scene']:<20} -q{row['quality']} {row['format']:<4} "
+              f"{(row['output_hash'] or '')[:12]}")
+        if row['status'] == 'failed' and row['error']:
+            print(f"      {row['error'].splitlines()[-1]}")
+    counts = {}
+    for row in rows:
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+    print(', '.join(f'{n} {s}' for s, n in sorted(counts.items())))
+
+def main():
+    parser = argparse.ArgumentParser(description='Queue and render scenes')
+    parser.add_argument('--db', default=str(HERE / 'media' / 'renderqueue.sqlite'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='Queue one scene')
+    add.add_argument('file')
+    add.add_argument('scene')
+    add.add_argument('-o', '--output')
+    deck = commands.add_parser('deck', help='Queue every scene a deck uses from gfx/')
+    deck.add_argument('decks', nargs='+')
+    for p in (add, deck):
+        p.add_argument('-q', '--quality', choices=QUALITIES, default='h')
+        p.add_argument('-p', '--priority', type=int, default=0)
+        p.add_argument('--max-attempts', type=int, default=3)
+    add.add_argument('-f', '--format', choices=FORMATS, default='mp4')
+
+    run_parser = commands.add_parser('run', help='Render queued jobs')
+    run_parser.add_argument('-j', '--jobs', type=int, default=2)
+    status_parser = commands.add_parser('status', help='Show jobs and timings')
+    status_parser.add_argument('--json', action='store_true')
+    commands.add_parser('retry', help='Queue failed jobs again')
+    args = parser.parse_args()
+
+    Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+    db = connect(args.db)
+    if args.command == 'add':
+        job = add_job(db, args.file, args.scene, args.quality, args.format, args.output,
+                      args.priority, args.max_attempts)
+        print(f'queued job {job}')
+    elif args.command == 'deck':
+        for d in args.decks:
+            jobs = deck_jobs(d)
+            for file, scene, format, output in jobs:
+                add_job(db, file, scene, args.quality, format, output, args.priority, args.max_attempts)
+            print(f'queued {len(jobs)} jobs for {d}')
+    elif args.command == 'run':
+        try:
+            run(args.db, args.jobs)
+        except KeyboardInterrupt:
+            print('interrupted, run again to resume')
+            sys.exit(1)
+    elif args.command == 'status':
+        status(db, args.json)
+    elif args.command == 'retry':
+        count = db.execute("update jobs set status = 'pending', attempts = 0 where status = 'failed'").rowcount
+        print(f'queued {count} failed jobs again')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+from pathlib import Path
+import argparse
+import ast
+import hashlib
+import html
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from watch import Graph
+
+# Build reveal.js slides from the annotated scenes in examples.py.
+#
+#   # Title
+#   ## Description line
+#   ## NOTES: Speaker notes, continued on
+#   ##        more ## lines
+#
+#   class Title(Scene):
+#       ...
+#
+#   python slides.py                  # writes examples.html
+#   python slides.py --render         # also renders scenes whose code changed
+#
+# Each scene becomes a section with its title, description, source and
+# gfx/<Scene>.mp4 (or .png). Sections are cached by the scene's source and
+# everything it depends on plus the video file, so only edited scenes are
+# rebuilt and rendered.
+
+HERE = Path(__file__).resolve().parent
+
+PAGE = '''<!doctype html>
+<html lang="en">
+	<head>
+		<meta charset="utf-8">
+		<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
+
+		<title>{title}</title>
+
+		<link rel="stylesheet" href="dist/reset.css">
+		<link rel="stylesheet" href="dist/reveal.css">
+		<link rel="stylesheet" href="dist/theme/night.css">
+
+		<!-- Theme used for syntax highlighted code -->
+		<link rel="stylesheet" href="plugin/highlight/github-dark.css">
+	</head>
+	<body>
+		<div class="reveal">
+			<div class="slides">
+{sections}
+			</div>
+		</div>
+		<script src="dist/reveal.js"></script>
+		<script src="plugin/notes/notes.js"></script>
+		<script src="plugin/highlight/highlight.js"></script>
+		<script>
+			Reveal.initialize({{
+				hash: true,
+				plugins: [ RevealHighlight, RevealNotes ]
+			}});
+		</script>
+	</body>
+</html>
+'''
+
+def annotations(lines, lineno):
+    """Title, description and notes from the comments above line lineno.
+
+    Only a block of one '# ' line followed by '##' lines counts, so
+    commented out code is not mistaken for a slide.
+    """
+    i = lineno - 2
+    while i >= 0 and not lines[i].strip():
+        i -= 1
+    block = []
+    while i >= 0 and lines[i].startswith('#'):
+        block.insert(0, lines[i])
+        i -= 1
+    if not block or not re.match(r'# \S', block[0]) or not all(l.startswith('##') for l in block[1:]):
+        return None, [], []
+    description, notes = [], []
+    for line in block[1:]:
+        text = line.lstrip('#').strip()
+        if text.startswith('NOTES:'):
+            notes.append(text[len('NOTES:'):].strip())
+        elif notes:
+            notes.append(text)
+        else:
+            description.append(text)
+    return block[0][2:].strip(), description, notes
+
+def media(name):
+    for path in [HERE / 'gfx' / f'{name}.mp4', *sorted((HERE / 'gfx').glob(f'{name}_ManimCE_*.png')),
+                 HERE / 'gfx' / f'{name}.png']:
+        if path.exists():
+            return path
+    return None
+
+def section(slide):
+    parts = [f"<h3>{html.escape(slide['title'])}</h3>"]
+    if slide['description']:
+        parts.append(f"<p>{html.escape(' '.join(slide['description']))}</p>")
+    parts.append('<pre><code class="language-python" data-trim data-noescape>\n'
+                 f"{html.escape(slide['source'])}\n</code></pre>")
+    if slide['media'] is None:
+        media_html = f"<p><small>gfx/{slide['name']} not rendered yet</small></p>"
+    elif slide['media'].endswith('.mp4'):
+        media_html = f'<video src="{slide["media"]}" controls></video>'
+    else:
+        media_html = f'<img src="{slide["media"]}" />'
+    notes = f"\n<aside class=\"notes\">{html.escape(' '.join(slide['notes']))}</aside>" if slide['notes'] else ''
+    # Code and result are two vertical slides, like the hand made deck
+    return (f"<section>\n<section>\n" + '\n'.join(parts) + notes + "\n</section>\n"
+            f"<section>\n{media_html}{notes}\n</section>\n</section>")
+
+def render(file, name, quality):
+    with tempfile.TemporaryDirectory(prefix='slides-') as tmp:
+        result = subprocess.run([sys.executable, '-m', 'manim', 'render', f'-q{quality}', '--media_dir', tmp,
+                                 file.name, name], cwd=file.parent, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{name}: render failed\n{result.stderr.strip()[-2000:]}")
+            return False
+        produced = [p for p in Path(tmp).rglob(f'{name}.mp4') if 'partial_movie_files' not in p.parts] \
+            or list(Path(tmp).rglob(f'{name}_ManimCE_*.png'))
+        if not produced:
+            return False
+        shutil.copyfile(produced[0], HERE / 'gfx' / produced[0].name)
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate slides from examples.py')
+    parser.add_argument('file', nargs='?', default=str(HERE / 'examples.py'))
+    parser.add_argument('-o', '--output', default=str(HERE / 'examples.html'))
+    parser.add_argument('--title', default='Creating animations with manim')
+    parser.add_argument('--render', action='store_true', help='Render scenes whose code changed')
+    parser.add_argument('-q', '--quality', default='m')
+    parser.add_argument('--cache', default=str(HERE / 'media' / 'slides-cache.json'))
+    args = parser.parse_args()
+
+    file = Path(args.file).resolve()
+    source = file.read_text()
+    lines = source.splitlines()
+    graph = Graph([file])
+    hashes = graph.hashes()
+    cache_path = Path(args.cache)
+    cache = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+
+    sections = []
+    rebuilt = []
+    for node in ast.parse(source).body:
+        if not isinstance(node, ast.ClassDef) or (file, node.name) not in graph.scenes:
+            continue
+        name = node.name
+        title, description, notes = annotations(lines, node.lineno)
+        code = hashlib.sha1(''.join(
+            f'{p}:{n}:{hashes[p, n]}' for p, n in sorted(graph.dependencies((file, name)))).encode()).hexdigest()
+        entry = cache.setdefault(name, {})
+        # Videos already there on the first run are taken as up to date
+        entry.setdefault('rendered', code if media(name) else None)
+        if args.render and entry['rendered'] != code:
+            print(f"{name}: rendering")
+            if render(file, name, args.quality):
+                entry['rendered'] = code
+        path = media(name)
+        stat = path.stat() if path else None
+        video = f'{path.name}:{stat.st_mtime_ns}:{stat.st_size}' if path else ''
+        key = hashlib.sha1(json.dumps([title, description, notes, code, video]).encode()).hexdigest()
+        if entry.get('key') != key:
+            entry.update(key=key, html=section({
+                'name': name,
+                'title': title or name,
+                'description': description,
+                'notes': notes,
+                'source': ast.get_source_segment(source, node),
+                'media': f'gfx/{path.name}' if path else None,
+            }))
+            rebuilt.append(name)
+        sections.append(entry['html'])
+
+    page = PAGE.format(title=html.escape(args.title), sections='\n'.join(sections))
+    output = Path(args.output)
+    if not output.exists() or output.read_text() != page:
+        output.write_text(page)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(cache))
+    print(f"{len(sections)} sections, rebuilt {len(rebuilt)}{': ' + ', '.join(rebuilt) if rebuilt else ''}")
+
+if __name__ == '__main__':
+    main()
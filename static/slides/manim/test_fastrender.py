@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+# pytest test_fastrender.py, needs manim with its Cairo renderer
+
+manim = pytest.importorskip('manim')
+from manim import *
+
+from fastrender import FastRenderer, FastScene
+
+SETTINGS = {
+    'dry_run': True,
+    'disable_caching': True,
+    'progress_bar': 'none',
+    'pixel_width': 160,
+    'pixel_height': 90,
+    'frame_rate': 10,
+}
+
+class RecordingRenderer(FastRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.frames = []
+
+    def add_frame(self, frame, num_frames=1):
+        self.frames.append(np.array(frame))
+        super().add_frame(frame, num_frames)
+
+def render(scene_class, camera_class=Camera):
+    with tempconfig(SETTINGS):
+        renderer = RecordingRenderer(camera_class=camera_class)
+        scene_class(renderer=renderer).render()
+        return renderer.frames
+
+def is_red(frame, point):
+    # point is relative to the center of the frame
+    x = int((point[0] / config.frame_width + 0.5) * frame.shape[1])
+    y = int((0.5 - point[1] / config.frame_height) * frame.shape[0])
+    r, g, b = frame[y, x, :3]
+    return r > 200 and g < 60 and b < 60
+
+def red_square():
+    return Square(1).set_fill(RED, 1).set_stroke(width=0).shift(RIGHT * 3)
+
+class AddDuringPlay(FastScene):
+    def construct(self):
+        self.red = red_square()
+        group = VGroup(Square(1).set_fill(BLUE, 1).shift(LEFT * 3))
+        # Static mobject drawn above the moving ones, goes to the overlay
+        self.add(group, Dot(DOWN * 3))
+
+        def grow(mob, alpha):
+            if alpha > 0.5 and self.red not in mob:
+                mob.add(self.red)
+
+        self.play(UpdateFromAlphaFunc(group, grow), run_time=1)
+
+class RemoveDuringPlay(FastScene):
+    def construct(self):
+        self.red = red_square()
+        group = VGroup(Square(1).set_fill(BLUE, 1).shift(LEFT * 3), self.red)
+        self.add(group, Dot(DOWN * 3))
+
+        def shrink(mob, alpha):
+            if alpha > 0.5:
+                mob.remove(self.red)
+
+        self.play(UpdateFromAlphaFunc(group, shrink), run_time=1)
+
+def test_submobject_added_during_play_is_drawn():
+    frames = render(AddDuringPlay)
+    assert not is_red(frames[0], RIGHT * 3)
+    assert is_red(frames[-1], RIGHT * 3)
+
+def test_submobject_removed_during_play_is_not_drawn():
+    frames = render(RemoveDuringPlay)
+    assert is_red(frames[0], RIGHT * 3)
+    assert not is_red(frames[-1], RIGHT * 3)
+
+class PanOverSequence(FastScene):
+    update_step = None
+
+    def construct(self):
+        from deep import UnrolledSequence
+        frame = self.camera.frame
+        # Red squares 2 units apart, step 10 is at x = 14
+        self.seq = UnrolledSequence(40, lambda i: red_square(), frame, step_width=2, start=LEFT * 6,
+                                    update_step=self.update_step)
+        self.steps_held = []
+        self.seq.add_updater(lambda m: self.steps_held.append(len(m.pool) + len(m.live)))
+        self.add(self.seq)
+        self.play(frame.animate.move_to(RIGHT * 14), run_time=1, rate_func=linear)
+        # play() does not draw its last frame, the wait does
+        self.wait(0.1)
+        self.first_pan_end = self.renderer.frames[-1]
+        self.play(frame.animate.move_to(RIGHT * 60), run_time=1, rate_func=linear)
+
+class PanOverPooledSequence(PanOverSequence):
+    @staticmethod
+    def update_step(mob, i):
+        return mob
+
+def pan(scene_class):
+    with tempconfig(SETTINGS):
+        renderer = RecordingRenderer(camera_class=MovingCamera)
+        scene = scene_class(renderer=renderer)
+        scene.render()
+        return scene
+
+def test_steps_created_during_pan_are_drawn():
+    pytest.importorskip('torch')
+    scene = pan(PanOverSequence)
+    # Camera ends the first pan centered on step 10, which did not exist at
+    # the start
+    assert is_red(scene.first_pan_end, ORIGIN)
+
+@pytest.mark.parametrize('scene_class', [PanOverSequence, PanOverPooledSequence])
+def test_steps_held_while_panning_are_bounded(scene_class):
+    pytest.importorskip('torch')
+    scene = pan(scene_class)
+    # The frame is about 7 steps wide plus a margin of 1 on both sides,
+    # steps that scrolled out are reused in the same frame. Nothing grows
+    # with the 40 steps passed.
+    assert max(scene.steps_held) <= 14
@@ -0,0 +1,126 @@
+// Plays the .vec.json animations written by vector.py as SVG.
+//
+//   <div class="vector-animation" data-src="gfx/CreateCircle.vec.json"></div>
+//   <script src="vector.js"></script>
+//
+// Starts when its slide is shown (right away outside reveal.js), click to
+// play again.
+(function () {
+  const SVG = 'http://www.w3.org/2000/svg';
+  let animations = 0;
+
+  function element(name, attributes, parent) {
+    const e = document.createElementNS(SVG, name);
+    for (const [key, value] of Object.entries(attributes)) e.setAttribute(key, value);
+    if (parent) parent.appendChild(e);
+    return e;
+  }
+
+  class VectorAnimation {
+    constructor(container, data) {
+      this.data = data;
+      this.prefix = `vec${animations++}-`;
+      const [x, y, width, height] = data.viewBox;
+      this.svg = element('svg', { viewBox: data.viewBox.join(' '), width: '100%' }, container);
+      element('rect', { x, y, width, height, fill: data.background }, this.svg);
+      // Shared paths, every object is a <use> of one
+      const defs = element('defs', {}, this.svg);
+      data.paths.forEach((d, i) => element('path', { id: this.prefix + i, d }, defs));
+      this.layer = element('g', {}, this.svg);
+      this.reset();
+    }
+
+    reset() {
+      this.layer.replaceChildren();
+      this.uses = {};
+      // Last applied entry of every track and of the drawing order
+      this.applied = {};
+      for (const id in this.data.tracks) this.applied[id] = -1;
+      this.ordered = -1;
+      this.frame = -1;
+    }
+
+    apply(id, entry) {
+      if (entry.length === 1) {
+        this.uses[id].remove();
+        delete this.uses[id];
+        return;
+      }
+      if (entry.length === 3) return this.move(id, entry[1], entry[2]);
+      const [, path, x, y, style] = entry;
+      const [fill, fillOpacity, stroke, strokeOpacity, strokeWidth] = this.data.styles[style];
+      this.uses[id] = this.uses[id] || element('use', {});
+      const use = this.uses[id];
+      use.setAttribute('href', `#${this.prefix}${path}`);
+      use.setAttribute('fill', fill);
+      use.setAttribute('fill-opacity', fillOpacity);
+      use.setAttribute('stroke', stroke);
+      use.setAttribute('stroke-opacity', strokeOpacity);
+      use.setAttribute('stroke-width', strokeWidth);
+      this.move(id, x, y);
+    }
+
+    move(id, x, y) {
+      this.uses[id].setAttribute('x', x);
+      this.uses[id].setAttribute('y', y);
+    }
+
+    show(frame) {
+      if (frame < this.frame) this.reset();
+      this.frame = frame;
+      for (const [id, track] of Object.entries(this.data.tracks)) {
+        let i = this.applied[id];
+        while (i + 1 < track.length && track[i + 1][0] <= frame) this.apply(id, track[++i]);
+        this.applied[id] = i;
+        // Moves are reached in a straight line from the entry before
+        const next = track[i + 1];
+        if (i >= 0 && next && next.length === 3) {
+          const entry = track[i];
+          const [x, y] = entry.length === 3 ? entry.slice(1) : entry.slice(2, 4);
+          const alpha = (frame - entry[0]) / (next[0] - entry[0]);
+          this.move(id, x + (next[1] - x) * alpha, y + (next[2] - y) * alpha);
+        }
+      }
+      const order = this.data.order;
+      let changed = false;
+      while (this.ordered + 1 < order.length && order[this.ordered + 1][0] <= frame) {
+        this.ordered++;
+        changed = true;
+      }
+      if (changed) {
+        for (const id of order[this.ordered][1]) this.layer.appendChild(this.uses[id]);
+      }
+    }
+
+    play() {
+      cancelAnimationFrame(this.request);
+      const start = performance.now();
+      const step = (now) => {
+        const frame = Math.min(Math.floor((now - start) / 1000 * this.data.fps), this.data.frames - 1);
+        this.show(frame);
+        if (frame < this.data.frames - 1) this.request = requestAnimationFrame(step);
+      };
+      this.request = requestAnimationFrame(step);
+    }
+  }
+
+  async function load(container) {
+    const data = await (await fetch(container.dataset.src)).json();
+    const animation = new VectorAnimation(container, data);
+    animation.show(0);
+    container.addEventListener('click', () => animation.play());
+    const reveal = window.Reveal;
+    const slide = container.closest('section');
+    if (reveal && slide) {
+      reveal.on('slidechanged', (event) => {
+        if (event.currentSlide === slide || slide.contains(event.currentSlide)) animation.play();
+      });
+      if (reveal.isReady() && reveal.getCurrentSlide() === slide) animation.play();
+    } else {
+      animation.play();
+    }
+  }
+
+  document.querySelectorAll('.vector-animation').forEach(load);
+  window.VectorAnimation = VectorAnimation;
+})();
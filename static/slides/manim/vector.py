@@ -0,0 +1,242 @@
+from manim import *
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.utils.iterables import list_update
+from manim.utils.module_ops import get_module, get_scene_classes_from_module
+from pathlib import Path
+import argparse
+import gzip
+import json
+import numpy as np
+
+# Export scenes as vector animations instead of video.
+#
+#   python vector.py examples.py CreateCircle ShiftObjects LinkedListRemove BinaryTree1
+#
+# Writes gfx/<Scene>.vec.json, which vector.js plays in the deck as SVG:
+#
+#   <div class="vector-animation" data-src="gfx/CreateCircle.vec.json"></div>
+#   <script src="vector.js"></script>
+#
+# Every frame manim would rasterize is recorded as the list of VMobjects on
+# screen. Each one becomes a path drawn relative to its first point, stored
+# once in a shared list of definitions, plus an offset and a style: a shape
+# that only moves reuses its path, and copies of a shape share one. Objects
+# have tracks listing only what changed and when, and frames where an
+# object just slides along a straight line are left out and interpolated by
+# the player. Images and background strokes are not exported, gradients
+# use their first color.
+
+# Largest position error allowed when dropping frames, in manim units
+# (a quarter pixel at 1080p)
+TOLERANCE = 0.002
+
+def coordinate(v):
+    s = f'{v:.3f}'.rstrip('0').rstrip('.')
+    return '0' if s == '-0' else s
+
+def color(rgba):
+    return '#{:02x}{:02x}{:02x}'.format(*(int(round(c * 255)) for c in rgba[:3]))
+
+class Recording:
+    def __init__(self, camera):
+        self.camera = camera
+        self.frames = 0
+        # (first frame, frames shown, [(object, path, x, y, style)] in draw order)
+        self.samples = []
+        self.paths = {}
+        self.styles = {}
+        # id(mobject) -> (mobject, object number), the mobject keeps the id unique
+        self.objects = {}
+        self.skipped = set()
+
+    def index(self, table, key):
+        if key not in table:
+            table[key] = len(table)
+        return table[key]
+
+    def path(self, vmob):
+        """Shared path definition index and the offset it is drawn at."""
+        points = vmob.points[:, :2] * [1, -1]
+        origin = np.round(points[0], 3)
+        parts = []
+        for subpath in vmob.gen_subpaths_from_points_2d(vmob.points):
+            n = vmob.n_points_per_cubic_curve
+            local = subpath[:len(subpath) // n * n, :2] * [1, -1] - origin
+            if len(local) == 0:
+                continue
+            curves = local.reshape(-1, n, 2)
+            parts.append(f'M{coordinate(curves[0, 0, 0])} {coordinate(curves[0, 0, 1])}C' + ' '.join(
+                coordinate(v) for v in curves[:, 1:].ravel()))
+            if vmob.consider_points_equals_2d(subpath[0], subpath[-1]):
+                parts.append('Z')
+        return self.index(self.paths, ''.join(parts)), float(origin[0]), float(origin[1])
+
+    def style(self, vmob):
+        # Gradients are drawn with their first color
+        fill = vmob.get_fill_rgbas()[0]
+        width = vmob.get_stroke_width()
+        stroke = vmob.get_stroke_rgbas()[0]
+        key = (color(fill), round(float(fill[3]), 3),
+               color(stroke) if width > 0 else 'none', round(float(stroke[3]), 3),
+               round(float(width * self.camera.cairo_line_width_multiple), 4))
+        return self.index(self.styles, key)
+
+    def add(self, mobjects, num_frames=1):
+        entries = []
+        for mob in self.camera.get_mobjects_to_display(mobjects):
+            if not isinstance(mob, VMobject):
+                self.skipped.add(type(mob).__name__)
+                continue
+            if len(mob.points) < mob.n_points_per_cubic_curve:
+                continue
+            _, number = self.objects.setdefault(id(mob), (mob, len(self.objects)))
+            entries.append((number, *self.path(mob), self.style(mob)))
+        self.samples.append((self.frames, num_frames, entries))
+        self.frames += num_frames
+
+    def encode(self, tolerance=TOLERANCE):
+        """Delta encoded tracks per object and changes of the drawing order."""
+        tracks = {}
+        runs = {}
+        order = []
+
+        def flush(number):
+            key, times, positions = runs.pop(number)
+            times, positions = np.array(times), np.array(positions)
+            track = tracks.setdefault(number, [])
+            track.append([int(times[0]), key[0], *positions[0].tolist(), key[1]])
+            keep = simplify(times, positions, tolerance)
+            if keep and np.array_equal(positions[keep[-1]], positions[keep[-2] if len(keep) > 1 else 0]):
+                # Standing still until the end needs no entry, earlier ones
+                # do, they end an interpolation
+                keep.pop()
+            track.extend([int(times[i]), *positions[i].tolist()] for i in keep)
+
+        for frame, count, entries in self.samples:
+            # A held frame is sampled at its first and last frame
+            times = [frame] if count == 1 else [frame, frame + count - 1]
+            shown = set()
+            for number, path, x, y, style in entries:
+                shown.add(number)
+                run = runs.get(number)
+                if run is not None and run[0] != (path, style):
+                    flush(number)
+                    run = None
+                if run is None:
+                    run = runs[number] = ((path, style), [], [])
+                run[1].extend(times)
+                run[2].extend([(x, y)] * len(times))
+            for number in [n for n in runs if n not in shown]:
+                flush(number)
+                tracks[number].append([frame])
+            drawn = [number for number, *_ in entries]
+            if not order or order[-1][1] != drawn:
+                order.append([frame, drawn])
+        for number in list(runs):
+            flush(number)
+        return tracks, order
+
+    def to_json(self, background, fps):
+        tracks, order = self.encode()
+        width, height = self.camera.frame_width, self.camera.frame_height
+        center = self.camera.frame_center
+        return {
+            'version': 1,
+            'fps': fps,
+            'frames': self.frames,
+            'viewBox': [round(center[0] - width / 2, 3), round(-center[1] - height / 2, 3),
+                        round(width, 3), round(height, 3)],
+            'background': background,
+            'paths': list(self.paths),
+            # [fill, fill opacity, stroke, stroke opacity, stroke width]
+            'styles': [list(style) for style in self.styles],
+            # [frame, path, x, y, style] sets, [frame, x, y] moves interpolated
+            # from the previous entry, [frame] removes
+            'tracks': {str(number): track for number, track in tracks.items()},
+            'order': order,
+        }
+
+def simplify(times, positions, tolerance):
+    """Indices to keep so that lines between them stay within tolerance.
+
+    Index 0 is the start and always implied, the last index is always kept.
+    """
+    keep = []
+    start, end = 0, 1
+    while end < len(times):
+        while end + 1 < len(times) and fits(times, positions, start, end + 1, tolerance):
+            end += 1
+        keep.append(end)
+        start, end = end, end + 1
+    return keep
+
+def fits(times, positions, start, end, tolerance):
+    alpha = (times[start:end + 1] - times[start]) / (times[end] - times[start])
+    line = positions[start] + alpha[:, None] * (positions[end] - positions[start])
+    return np.abs(positions[start:end + 1] - line).max() <= tolerance
+
+class VectorRenderer(CairoRenderer):
+    """Records frames into a Recording instead of rasterizing them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(skip_animations=False, **kwargs)
+        self.recording = Recording(self.camera)
+
+    def play(self, scene, *args, **kwargs):
+        scene.compile_animation_data(*args, **kwargs)
+        scene.begin_animations()
+        if scene.is_current_animation_frozen_frame():
+            self.record(scene, int(scene.duration * self.camera.frame_rate))
+        else:
+            scene.play_internal()
+        self.num_plays += 1
+
+    def render(self, scene, time, moving_mobjects):
+        self.record(scene)
+
+    def record(self, scene, num_frames=1):
+        if num_frames > 0:
+            self.recording.add(list_update(scene.mobjects, scene.foreground_mobjects), num_frames)
+            self.time += num_frames / self.camera.frame_rate
+
+    def scene_finished(self, scene):
+        # Hold the final state, the video ends on it too
+        self.record(scene)
+
+def export(scene_class, output):
+    renderer = VectorRenderer()
+    scene_class(renderer=renderer).render()
+    data = renderer.recording.to_json(color(renderer.camera.background_color.to_rgb()), config.frame_rate)
+    text = json.dumps(data, separators=(',', ':'))
+    output.write_text(text)
+    return text, renderer.recording.skipped
+
+def main():
+    parser = argparse.ArgumentParser(description='Export scenes as vector animations')
+    parser.add_argument('file')
+    parser.add_argument('scenes', nargs='*', help='Default is all scenes in file')
+    parser.add_argument('-o', '--output', default=str(Path(__file__).resolve().parent / 'gfx'))
+    parser.add_argument('--fps', type=int, default=30)
+    args = parser.parse_args()
+
+    config.dry_run = True
+    config.disable_caching = True
+    config.progress_bar = 'none'
+    config.verbosity = 'WARNING'
+    config.frame_rate = args.fps
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    for scene_class in get_scene_classes_from_module(get_module(Path(args.file))):
+        name = scene_class.__name__
+        if args.scenes and name not in args.scenes:
+            continue
+        path = output / f'{name}.vec.json'
+        text, skipped = export(scene_class, path)
+        video = output / f'{name}.mp4'
+        compare = f"  mp4 {video.stat().st_size / 1024:7.1f}K" if video.exists() else ''
+        print(f"{name:<20} {len(text) / 1024:7.1f}K  gzip {len(gzip.compress(text.encode())) / 1024:7.1f}K"
+              f"{compare}{'  skipped ' + ', '.join(sorted(skipped)) if skipped else ''}")
+
+if __name__ == '__main__':
+    main()
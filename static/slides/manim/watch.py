@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import ast
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+# Re-render only the scenes an edit can affect.
+#
+#   python watch.py deep.py examples.py -j 4
+#   python watch.py deep.py --deps TimeSeries
+#
+# Every module level function, class and assignment is a node identified by
+# (file, name), with a hash of its source and edges to the module level names
+# it mentions, following `from sibling import name` into sibling .py files.
+# When a file changes, scenes whose transitive dependencies include a node
+# with a different hash are rendered again at preview quality.
+
+SCENE_BASES = {'Scene', 'FastScene', 'MovingCameraScene', 'ThreeDScene', 'ZoomedScene'}
+
+class Module:
+    def __init__(self, path):
+        self.path = Path(path).resolve()
+        source = self.path.read_text()
+        tree = ast.parse(source)
+        # name -> (source hash, names mentioned, base names)
+        self.defs = {}
+        # name -> (module file, name) for local from-imports
+        self.imports = {}
+        for node in tree.body:
+            if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                sibling = self.path.parent / f'{node.module}.py'
+                if sibling.exists():
+                    for alias in node.names:
+                        self.imports[alias.asname or alias.name] = (sibling, alias.name)
+                continue
+            names = defined_names(node)
+            if not names:
+                continue
+            digest = hashlib.sha1(ast.get_source_segment(source, node).encode()).hexdigest()
+            used = {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+            used |= {n.value.id for n in ast.walk(node)
+                     if isinstance(n, ast.Attribute) and isinstance(n.value, ast.Name)}
+            bases = [b.id for b in getattr(node, 'bases', []) if isinstance(b, ast.Name)]
+            for name in names:
+                # Redefinitions accumulate, like the module namespace would
+                old_digest, old_used, old_bases = self.defs.get(name, ('', set(), []))
+                self.defs[name] = (old_digest + digest, (old_used | used) - {name}, old_bases + bases)
+
+def defined_names(node):
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        return [n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+    return []
+
+class Graph:
+    def __init__(self, files):
+        self.modules = {}
+        for file in files:
+            self.load(Path(file).resolve())
+        paths = [Path(file).resolve() for file in files]
+        self.scenes = [(path, name) for path in paths
+                       for name in self.modules[path].defs if self.is_scene((path, name))]
+
+    def load(self, path):
+        if path not in self.modules:
+            module = self.modules[path] = Module(path)
+            for sibling, _ in module.imports.values():
+                self.load(sibling)
+        return self.modules[path]
+
+    def resolve(self, path, name):
+        """Node for a name as seen from a module, or None if not ours."""
+        module = self.modules[path]
+        if name in module.defs:
+            return (path, name)
+        if name in module.imports:
+            sibling, original = module.imports[name]
+            return self.resolve(sibling, original)
+        return None
+
+    def edges(self, node):
+        path, name = node
+        _, used, _ = self.modules[path].defs[name]
+        return [n for n in (self.resolve(path, u) for u in sorted(used)) if n is not None]
+
+    def is_scene(self, node, seen=()):
+        path, name = node
+        for base in self.modules[path].defs[name][2]:
+            if base in SCENE_BASES:
+                return True
+            target = self.resolve(path, base)
+            if target is not None and target not in seen and self.is_scene(target, seen + (node,)):
+                return True
+        return False
+
+    def dependencies(self, node):
+        seen = {node}
+        stack = [node]
+        while stack:
+            for dep in self.edges(stack.pop()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def hashes(self):
+        return {(path, name): d[0] for path, m in self.modules.items() for name, d in m.defs.items()}
+
+def affected(graph, old_hashes):
+    new_hashes = graph.hashes()
+    changed = {node for node, h in new_hashes.items() if old_hashes.get(node) != h}
+    return [scene for scene in graph.scenes if graph.dependencies(scene) & changed]
+
+def render(scene, quality, draft):
+    path, name = scene
+    env = dict(os.environ)
+    command = [sys.executable, '-m', 'manim', 'render', f'-q{quality}', path.name, name]
+    if draft:
+        # The draft rasterizer is part of FastScene
+        env['FASTRENDER_DRAFT'] = str(draft)
+        command = [sys.executable, str(Path(__file__).resolve().parent / 'fastrender.py'),
+                   path.name, name, f'-q{quality}']
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=path.parent, env=env, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        print(f"{name}: failed after {seconds:.1f}s\n{result.stderr.strip()[-2000:]}", flush=True)
+    else:
+        print(f"{name}: rendered in {seconds:.1f}s", flush=True)
+
+def snapshot(files):
+    return {f: f.stat().st_mtime_ns for f in files}
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-render scenes affected by edits')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('-q', '--quality', default='l', help='manim quality letter, l for preview')
+    parser.add_argument('--draft', type=int, default=0, help='Also use the draft rasterizer at 1/n resolution')
+    parser.add_argument('--interval', type=float, default=0.3)
+    parser.add_argument('--deps', metavar='SCENE', help='Print what SCENE depends on and exit')
+    args = parser.parse_args()
+
+    graph = Graph(args.files)
+    if args.deps:
+        for scene in graph.scenes:
+            if scene[1] == args.deps:
+                for path, name in sorted(graph.dependencies(scene) - {scene}):
+                    print(f'{path.name}:{name}')
+        return
+
+    print(f"watching {len(graph.scenes)} scenes in {', '.join(p.name for p in graph.modules)}")
+    pool = ThreadPoolExecutor(args.jobs)
+    hashes = graph.hashes()
+    mtimes = snapshot(graph.modules)
+    while True:
+        time.sleep(args.interval)
+        if snapshot(mtimes) == mtimes:
+            continue
+        try:
+            graph = Graph(args.files)
+        except SyntaxError as e:
+            # Half saved file, wait for the next write
+            print(f"{e.filename}:{e.lineno}: {e.msg}", flush=True)
+            mtimes = snapshot(mtimes)
+            continue
+        scenes = affected(graph, hashes)
+        hashes = graph.hashes()
+        mtimes = snapshot(graph.modules)
+        if scenes:
+            print(f"rendering {', '.join(name for _, name in scenes)}", flush=True)
+            list(pool.map(lambda scene: render(scene, args.quality, args.draft), scenes))
+
+if __name__ == '__main__':
+    main()